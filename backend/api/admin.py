@@ -3,5 +3,5 @@ from .models import EquipmentDataset
 
 @admin.register(EquipmentDataset)
 class EquipmentDatasetAdmin(admin.ModelAdmin):
-    list_display = ('id', 'uploaded_at', 'file')
+    list_display = ('id', 'uploaded_at', 'filename')
     ordering = ('-uploaded_at',)
\ No newline at end of file
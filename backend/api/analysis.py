@@ -0,0 +1,261 @@
+import os
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .blobs import ensure_blob
+# ANALYSIS_VERSION is defined with the cache keys, so blobs.py can evict entries
+from .cache import ANALYSIS_VERSION, analysis_key, cached_result, compute_once
+from .columnar import ColumnStore, write_column_store
+from .models import DatasetAnalysis
+from .schema import PARAMETERS, REQUIRED_COLUMNS
+from .statistics import BlockStatistics, extend_statistics, with_distribution
+
+PREVIEW_ROWS = 10
+# Rows embedded in the analysis response; the rest is paged from the records endpoint
+RECORDS_PAGE_SIZE = 100
+
+class RunningAggregates:
+    """
+    Per-parameter count and sum plus per-Type counts, updated one block of
+    rows at a time so memory does not grow with the file.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.count = {key: 0 for key in PARAMETERS}
+        self.sum = {key: 0.0 for key in PARAMETERS}
+        # Insertion order is first appearance, the same order value_counts() starts from
+        self.type_counts = {}
+
+    def update(self, rows, values, type_counts):
+        """
+        Adds a block of `rows` rows. `values` maps each PARAMETERS key to a
+        float array, `type_counts` maps Type labels to their count in the block.
+        """
+        self.rows += rows
+        for key, array in values.items():
+            present = ~np.isnan(array)
+            self.count[key] += int(np.count_nonzero(present))
+            self.sum[key] += float(np.sum(array, where=present))
+        for type_name, n in type_counts.items():
+            self.type_counts[type_name] = self.type_counts.get(type_name, 0) + int(n)
+
+    def averages(self):
+        return {
+            key: round(self.sum[key] / self.count[key], 2) if self.count[key] else float('nan')
+            for key in PARAMETERS
+        }
+
+    def type_distribution(self):
+        # Same sort call value_counts() uses, so ties come out in the same order
+        counts = pd.Series(self.type_counts, dtype='int64').sort_values(ascending=False)
+        return {str(k): int(v) for k, v in counts.items()}
+
+def aggregate_store(store, block_rows=None, statistics=None):
+    """
+    RunningAggregates over a column store, one block of the memory-mapped
+    columns at a time. `statistics` (a BlockStatistics), if given, is
+    updated from the same blocks.
+    """
+    block_rows = block_rows or settings.ANALYSIS_CHUNK_ROWS
+    aggregates = RunningAggregates()
+    columns = {key: store.values(column) for key, column in PARAMETERS.items()}
+    codes = store.type_codes()
+
+    # Seed the categories in first-appearance order for value_counts() parity
+    aggregates.type_counts = {t: 0 for t in store.types}
+    for start in range(0, store.rows, block_rows):
+        stop = min(start + block_rows, store.rows)
+        block_codes = codes[start:stop]
+        counts = np.bincount(block_codes[block_codes >= 0], minlength=len(store.types))
+        block = {key: np.asarray(values[start:stop]) for key, values in columns.items()}
+        aggregates.update(stop - start, block, dict(zip(store.types, counts)))
+        if statistics is not None:
+            statistics.update(block, np.asarray(block_codes))
+    return aggregates
+
+class StoreRecords:
+    """
+    Sliceable view over a column store that yields rows as dicts, so DRF's
+    LimitOffsetPagination only materializes the requested page.
+    """
+
+    def __init__(self, store, columns=None, order=None):
+        # `order` holds the row positions to return (sorted and/or filtered); None means all rows
+        self.store = store
+        self.columns = columns or REQUIRED_COLUMNS
+        self.order = order
+
+    def __len__(self):
+        return self.store.rows if self.order is None else len(self.order)
+
+    def __getitem__(self, index):
+        start, stop, step = index.indices(len(self))
+        positions = np.arange(start, stop, step) if self.order is None else self.order[start:stop:step]
+        page = self.store.frame(self.columns, positions)
+        # JSON has no NaN; missing cells are sent as null
+        page = page.astype(object).where(page.notna(), None)
+        return page.to_dict(orient='records')
+
+    def columnar(self, start, stop):
+        """
+        Rows start..stop as {"columns": [...], "data": {column: values}}.
+        Numeric columns stay float64 arrays (NaN for missing), so no
+        per-row dicts are built and the renderer can write them directly.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        positions = np.arange(start, stop) if self.order is None else self.order[start:stop]
+        data = {}
+        for column in self.columns:
+            if column == 'Equipment Name':
+                data[column] = self.store.names(positions)
+            elif column == 'Type':
+                data[column] = self.store.type_labels(positions).tolist()
+            else:
+                data[column] = np.asarray(self.store.values(column)[positions])
+        return {"columns": list(self.columns), "data": data}
+
+def columnar_rows(rows, columns=None):
+    """
+    The columnar shape of a list of row dicts, for results already stored as rows.
+    """
+    columns = columns or REQUIRED_COLUMNS
+    return {"columns": list(columns), "data": {c: [row.get(c) for row in rows] for c in columns}}
+
+def store_path(blob):
+    return os.path.join(settings.MEDIA_ROOT, 'columns', blob.sha256)
+
+def open_store(dataset, progress=None):
+    """
+    Returns the ColumnStore of the dataset's content, converting the CSV on
+    first use. Datasets with identical content share one store.
+    """
+    blob = ensure_blob(dataset)
+    if blob.columns_dir:
+        path = os.path.join(settings.MEDIA_ROOT, blob.columns_dir)
+        if os.path.exists(path):
+            return ColumnStore(path)
+
+    path = store_path(blob)
+    store = write_column_store(blob.file.path, path, settings.ANALYSIS_CHUNK_ROWS, progress)
+    blob.columns_dir = os.path.relpath(path, settings.MEDIA_ROOT)
+    blob.save(update_fields=['columns_dir'])
+    return store
+
+def summarize_store(store):
+    """
+    Summary statistics of a column store.
+    """
+    statistics = BlockStatistics(store.types)
+    aggregates = aggregate_store(store, statistics=statistics)
+    records = StoreRecords(store)
+    return {
+        "total_count": aggregates.rows,
+        "averages": aggregates.averages(),
+        "type_distribution": aggregates.type_distribution(),
+        "stats": with_distribution(statistics.result(), store),
+        "preview": records[:PREVIEW_ROWS],
+        "records": records[:RECORDS_PAGE_SIZE],
+    }
+
+def extend_summary(result, store, start):
+    """
+    The summary of a store whose rows 0..start are summarized by `result`,
+    after rows were appended: counts and means are merged from the rows
+    start.., percentiles recomputed from the columns. Averages and the Type
+    distribution follow from the merged "stats" counts and means.
+    """
+    stats = extend_statistics(result["stats"], store, start)
+    aggregates = RunningAggregates()
+    aggregates.rows = store.rows
+    for key in PARAMETERS:
+        parameter = stats["parameters"][key]
+        aggregates.count[key] = parameter["count"]
+        aggregates.sum[key] = parameter["mean"] * parameter["count"] if parameter["count"] else 0.0
+    aggregates.type_counts = {t: stats["by_type"][t]["count"] for t in store.types}
+
+    records = StoreRecords(store)
+    return {
+        **result,
+        "total_count": aggregates.rows,
+        "averages": aggregates.averages(),
+        "type_distribution": aggregates.type_distribution(),
+        "stats": stats,
+        # The first rows only change while the dataset is shorter than a page
+        "preview": result["preview"] if len(result["preview"]) >= PREVIEW_ROWS else records[:PREVIEW_ROWS],
+        "records": result["records"] if len(result["records"]) >= RECORDS_PAGE_SIZE else records[:RECORDS_PAGE_SIZE],
+    }
+
+def analyze_dataset(dataset, progress=None):
+    """
+    Helper function to process the CSV and return statistics.
+
+    The CSV is parsed once, in chunks, into a column store; this and every
+    later analysis reads the memory-mapped columns instead of the text.
+    """
+    try:
+        store = open_store(dataset, progress)
+        return summarize_store(store), None
+    except Exception as e:
+        return None, str(e)
+
+def load_records(dataset, columns=None, ordering=None):
+    """
+    Returns the requested columns of a dataset as StoreRecords, sorted when
+    `ordering` is given. A leading '-' on `ordering` sorts descending.
+    """
+    store = open_store(dataset)
+    order = None
+    if ordering:
+        order = store.sort_order(ordering.lstrip('-'), descending=ordering.startswith('-'))
+    return StoreRecords(store, columns, order)
+
+def build_response(dataset, stats, shape='rows'):
+    """
+    Adds the per-dataset identifiers to a stored analysis result, with its
+    preview and records in the requested shape ('rows' or 'columnar').
+    """
+    response = {
+        "file_id": dataset.id,
+        "uploaded_at": dataset.uploaded_at,
+        **stats,
+    }
+    if shape == 'columnar':
+        response["preview"] = columnar_rows(stats["preview"])
+        response["records"] = columnar_rows(stats["records"])
+    return response
+
+def get_analysis(dataset, progress=None, shape='rows'):
+    """
+    Returns the analysis for a dataset, computing and storing it only when
+    no result exists yet for the current ANALYSIS_VERSION. Results are kept
+    per blob, so re-uploading the same bytes reuses them, and served from
+    the analysis cache when it holds them.
+    """
+    try:
+        blob = ensure_blob(dataset)
+    except OSError as e:
+        return None, str(e)
+    key = analysis_key(blob, ANALYSIS_VERSION)
+    stats = cached_result(key)
+    if stats is not None:
+        return build_response(dataset, stats, shape), None
+
+    def compute():
+        stored = DatasetAnalysis.objects.filter(blob=blob).first()
+        if stored is not None and stored.version == ANALYSIS_VERSION:
+            return stored.result, None
+        stats, error = analyze_dataset(dataset, progress)
+        if error is None:
+            DatasetAnalysis.objects.update_or_create(
+                blob=blob,
+                defaults={'version': ANALYSIS_VERSION, 'result': stats},
+            )
+        return stats, error
+
+    # The cache sits in front of both the stored result and the CSV, and
+    # only one worker at a time computes a given result
+    stats, error = compute_once(key, compute)
+    if error:
+        return None, error
+    return build_response(dataset, stats, shape), None
@@ -0,0 +1,142 @@
+import csv
+import hashlib
+import os
+import shutil
+import uuid
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from .analysis import ANALYSIS_VERSION, extend_summary, get_analysis, open_store, store_path
+from .blobs import READ_BLOCK, file_sha256, upload_name
+from .cache import analysis_cache, analysis_key
+from .columnar import append_column_store
+from .models import DatasetAnalysis, DatasetBlob
+from .schema import validate_csv
+
+def csv_header(f):
+    """
+    Column names of the header line of a CSV (a binary file object).
+    """
+    f.seek(0)
+    return [name.strip() for name in next(csv.reader([f.readline().decode('utf-8-sig')]), [])]
+
+def append_csv_rows(csv_path, upload):
+    """
+    Appends the rows of an uploaded CSV to the stored one, byte for byte as
+    they were sent, without their header line. Returns (bytes written,
+    SHA-256 of those bytes).
+    """
+    with open(csv_path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        # The last row of a file without a trailing newline must be ended first
+        needs_newline = f.read(1) != b'\n'
+
+    digest = hashlib.sha256()
+    written = 0
+    upload.seek(0)
+    upload.readline()
+    with open(csv_path, 'ab') as f:
+        if needs_newline:
+            f.write(b'\n')
+            digest.update(b'\n')
+            written += 1
+        for block in iter(lambda: upload.read(READ_BLOCK), b''):
+            f.write(block)
+            digest.update(block)
+            written += len(block)
+    return written, digest.hexdigest()
+
+def copy_blob_files(blob, store):
+    """
+    Private copies of a shared blob's CSV and column store, for a dataset
+    about to diverge from the others. Returns (storage name, store path).
+    """
+    name = upload_name(os.path.basename(blob.file.name))
+    destination = default_storage.path(name)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    shutil.copyfile(blob.file.path, destination)
+    columns = os.path.join(settings.MEDIA_ROOT, 'columns', f'{blob.sha256}.copy-{uuid.uuid4().hex}')
+    shutil.copytree(store.path, columns)
+    return name, columns
+
+def append_rows(dataset, upload):
+    """
+    Appends the rows of an uploaded CSV to a dataset: its column store is
+    extended and its stored analysis updated from the new rows (percentiles
+    and histograms from the columns, see extend_statistics). The CSV must have the dataset's header, so its rows are stored as sent.
+
+    A blob shared with other datasets (identical uploads) is copied first,
+    so the others keep their content. The blob row stays locked throughout;
+    a concurrent upload of the old bytes waits for it and then stores its
+    own copy. The blob's SHA-256 is that of the new file (read once, not
+    parsed); its revision chains the old one with the SHA-256 of the
+    appended bytes. Returns (analysis result, error).
+    """
+    _, error = validate_csv(upload)
+    if error:
+        return None, error
+    # A current analysis (and column store) to extend
+    _, error = get_analysis(dataset)
+    if error:
+        return None, error
+
+    with transaction.atomic():
+        blob = DatasetBlob.objects.select_for_update().get(pk=dataset.blob_id)
+        with blob.file.open('rb') as f:
+            header = csv_header(f)
+        if csv_header(upload) != header:
+            return None, f"CSV header must match the dataset's header: {header}"
+
+        store = open_store(dataset)
+        shared = blob.datasets.exclude(pk=dataset.pk).exists()
+        if shared:
+            name, columns = copy_blob_files(blob, store)
+            csv_path = default_storage.path(name)
+        else:
+            name, columns, csv_path = blob.file.name, store.path, blob.file.path
+
+        start = store.rows
+        try:
+            upload.seek(0)
+            store = append_column_store(columns, upload, settings.ANALYSIS_CHUNK_ROWS)
+        except (ValueError, OSError) as e:
+            if shared:
+                default_storage.delete(name)
+                shutil.rmtree(columns, ignore_errors=True)
+            return None, str(e)
+        written, appended = append_csv_rows(csv_path, upload)
+
+        old_key = analysis_key(blob, ANALYSIS_VERSION)
+        analysis = DatasetAnalysis.objects.get(blob=blob)
+        result = extend_summary(analysis.result, store, start)
+        digest = file_sha256(csv_path)
+        revision = hashlib.sha256(f'{blob.revision}:{appended}'.encode()).hexdigest()
+        if DatasetBlob.objects.filter(sha256=digest).exclude(pk=blob.pk).exists():
+            # The appended file equals one stored already; keep it as a private
+            # blob under its chained digest rather than merge the two
+            digest = revision
+        # Renamed after the new digest, so a later upload of the old bytes builds its own store
+        final = store_path(DatasetBlob(sha256=digest))
+        os.replace(columns, final)
+        columns_dir = os.path.relpath(final, settings.MEDIA_ROOT)
+
+        if shared:
+            blob = DatasetBlob.objects.create(
+                sha256=digest, revision=revision, file=name, size=blob.size + written, columns_dir=columns_dir)
+            DatasetAnalysis.objects.create(blob=blob, version=ANALYSIS_VERSION, result=result)
+            dataset.blob = blob
+            dataset.file = name
+            dataset.save(update_fields=['blob', 'file'])
+        else:
+            analysis_cache().delete(old_key)
+            blob.sha256 = digest
+            blob.revision = revision
+            blob.size += written
+            blob.columns_dir = columns_dir
+            blob.save(update_fields=['sha256', 'revision', 'size', 'columns_dir'])
+            analysis.result = result
+            analysis.save(update_fields=['result', 'computed_at'])
+            dataset.blob = blob
+
+    analysis_cache().set(analysis_key(blob, ANALYSIS_VERSION), result)
+    return result, None
@@ -0,0 +1,218 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import uuid
+import zipfile
+import django
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.db import transaction
+from .analysis import ANALYSIS_VERSION, RunningAggregates, store_path, summarize_store
+from .blobs import READ_BLOCK, adopt_file, ensure_blob
+from .cache import analysis_cache, analysis_key, cached_result
+from .columnar import write_column_store
+from .models import DatasetAnalysis, EquipmentDataset
+from .schema import PARAMETERS, validate_csv
+
+_pool = None
+_pool_lock = threading.Lock()
+# Error of the files whose conversion was lost with a pool process
+WORKER_LOST = "The analysis worker stopped unexpectedly; upload the file again"
+
+def make_pool(workers):
+    """
+    A process pool for CSV conversions. Workers are spawned rather than
+    forked, so they never share the server's threads or database connections.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        # Spawned workers start blank: set Django up before they import this
+        # module (and the models). DJANGO_SETTINGS_MODULE is inherited.
+        initializer=django.setup,
+    )
+
+def get_pool():
+    """
+    Returns the process-wide pool for batch analyses, created on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = make_pool(settings.BATCH_WORKERS)
+    return _pool
+
+def discard_pool(pool):
+    """
+    Shuts down a broken pool (a worker died, e.g. killed for memory) so the
+    next get_pool() starts a fresh one instead of failing forever.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def submit_analysis(blob):
+    """
+    Queues the conversion of a blob's CSV on the pool, replacing the pool
+    once if it is broken. Returns (pool, future).
+    """
+    for attempt in range(2):
+        pool = get_pool()
+        try:
+            return pool, pool.submit(analyze_csv, blob.file.path, store_path(blob),
+                                     settings.ANALYSIS_CHUNK_ROWS, settings.CSV_ENGINE)
+        except BrokenProcessPool:
+            discard_pool(pool)
+            if attempt:
+                raise
+
+def analyze_csv(csv_path, dest, chunk_rows, engine):
+    """
+    Converts a CSV into a column store and summarizes it. Runs in a pool
+    process, so it only touches files, never the database.
+    Returns (stats, error).
+    """
+    try:
+        return summarize_store(write_column_store(csv_path, dest, chunk_rows, engine=engine)), None
+    except Exception as e:
+        return None, str(e)
+
+def spool(source, filename):
+    """
+    Copies a file object into a temporary file next to the uploads,
+    hashing it on the way. Returns (path, sha256).
+    """
+    directory = os.path.join(settings.MEDIA_ROOT, 'batch')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{uuid.uuid4().hex}.part')
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        for block in iter(lambda: source.read(READ_BLOCK), b''):
+            digest.update(block)
+            f.write(block)
+    return path, digest.hexdigest()
+
+def batch_members(uploads):
+    """
+    Expands the uploaded files into (filename, opener) pairs, one per CSV:
+    plain files as they are, zip archives as their .csv members (folders,
+    hidden files and other members are skipped). Returns (members, error).
+    """
+    members = []
+    total = 0
+    for upload in uploads:
+        if not zipfile.is_zipfile(upload):
+            upload.seek(0)
+            members.append((upload.name, lambda upload=upload: upload))
+            total += upload.size
+            continue
+        upload.seek(0)
+        archive = zipfile.ZipFile(upload)
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or name.startswith('.') or '__MACOSX/' in info.filename:
+                continue
+            if not name.lower().endswith('.csv'):
+                continue
+            members.append((name, lambda archive=archive, info=info: archive.open(info)))
+            total += info.file_size
+
+    if not members:
+        return None, "No CSV files in the upload"
+    if len(members) > settings.BATCH_MAX_FILES:
+        return None, f"Too many files: {len(members)} (limit {settings.BATCH_MAX_FILES})"
+    if total > settings.BATCH_MAX_BYTES:
+        return None, f"Batch too large: {total} bytes of CSV (limit {settings.BATCH_MAX_BYTES})"
+    return members, None
+
+def store_member(user, filename, source):
+    """
+    Validates one CSV of a batch and records it as a new EquipmentDataset,
+    sharing the blob of identical bytes. Returns (dataset, error).
+    """
+    path, digest = spool(source, filename)
+    try:
+        with open(path, 'rb') as f:
+            _, error = validate_csv(f)
+        if error:
+            return None, error
+        with transaction.atomic():
+            blob = adopt_file(path, filename, digest)
+            dataset = EquipmentDataset.objects.create(
+                user=user, blob=blob, file=blob.file.name, filename=filename)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    return dataset, None
+
+def analyze_batch(datasets):
+    """
+    Analyses of several datasets, with the CSV conversions spread over the
+    process pool. Results already cached or stored are reused, and datasets
+    sharing a blob are analyzed once. Returns {dataset id: (stats, error)}.
+    """
+    outcomes = {}
+    pending = {}
+    for dataset in datasets:
+        blob = ensure_blob(dataset)
+        key = analysis_key(blob, ANALYSIS_VERSION)
+        stats = cached_result(key)
+        if stats is None:
+            stored = DatasetAnalysis.objects.filter(blob=blob, version=ANALYSIS_VERSION).first()
+            stats = stored.result if stored is not None else None
+        if stats is not None:
+            outcomes[dataset.pk] = (stats, None)
+            continue
+        if blob.pk not in pending:
+            try:
+                pool, future = submit_analysis(blob)
+            except BrokenProcessPool:
+                pool, future = None, None
+            pending[blob.pk] = (blob, key, pool, future, [])
+        pending[blob.pk][4].append(dataset.pk)
+
+    for blob, key, pool, future, dataset_ids in pending.values():
+        # A failure of one file's conversion becomes that file's error, never the batch's
+        try:
+            stats, error = future.result() if future is not None else (None, WORKER_LOST)
+        except BrokenProcessPool:
+            discard_pool(pool)
+            stats, error = None, WORKER_LOST
+        except Exception as e:
+            stats, error = None, str(e)
+        if error is None:
+            blob.columns_dir = os.path.relpath(store_path(blob), settings.MEDIA_ROOT)
+            blob.save(update_fields=['columns_dir'])
+            DatasetAnalysis.objects.update_or_create(
+                blob=blob, defaults={'version': ANALYSIS_VERSION, 'result': stats})
+            analysis_cache().set(key, stats)
+        for dataset_id in dataset_ids:
+            outcomes[dataset_id] = (stats, error)
+    return outcomes
+
+def merge_summaries(results):
+    """
+    Row count, averages and Type distribution over several analyses, as if
+    their rows were one file. Averages are weighted by each file's count of
+    values, taken from its unrounded "stats".
+    """
+    aggregates = RunningAggregates()
+    for stats in results:
+        aggregates.rows += stats["total_count"]
+        for key in PARAMETERS:
+            parameter = stats["stats"]["parameters"][key]
+            if parameter["count"]:
+                aggregates.count[key] += parameter["count"]
+                aggregates.sum[key] += parameter["mean"] * parameter["count"]
+        for type_name, n in stats["type_distribution"].items():
+            aggregates.type_counts[type_name] = aggregates.type_counts.get(type_name, 0) + n
+    return {
+        "files": len(results),
+        "total_count": aggregates.rows,
+        "averages": aggregates.averages(),
+        "type_distribution": aggregates.type_distribution(),
+    }
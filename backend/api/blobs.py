@@ -0,0 +1,156 @@
+import hashlib
+import os
+import shutil
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import ProtectedError
+from .cache import ANALYSIS_VERSION, analysis_cache, analysis_key
+from .models import DatasetBlob, EquipmentDataset
+
+READ_BLOCK = 1024 * 1024
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Computes the SHA-256 of each uploaded file while it streams in.
+
+    Installed first in request.upload_handlers; it passes every chunk on
+    unchanged, so the regular handlers still store the file.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self.hasher.hexdigest()
+        # None lets the next handler return the stored file
+        return None
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def upload_name(filename):
+    """
+    Free storage name for a new file under the datasets' upload_to.
+    """
+    field = EquipmentDataset._meta.get_field('file')
+    return default_storage.get_available_name(field.generate_filename(None, filename))
+
+def existing_blob(digest):
+    """
+    Returns (blob with these bytes or None, whether its file is still stored).
+    The blob row is locked until the caller's transaction ends.
+    """
+    blob = DatasetBlob.objects.select_for_update().filter(sha256=digest).first()
+    return blob, blob is not None and default_storage.exists(blob.file.name)
+
+def store_blob(content, digest):
+    """
+    Returns the blob for an uploaded file (a Django File) with SHA-256
+    `digest`. The file is only written when no blob holds those bytes yet.
+
+    Call it in the transaction that creates the dataset: the blob stays
+    locked, so appending rows to it (api/append.py) cannot change its bytes
+    before the new dataset references it.
+    """
+    blob, stored = existing_blob(digest)
+    if stored:
+        return blob
+
+    name = default_storage.save(upload_name(content.name), content)
+    return save_blob(blob, digest, name)
+
+def adopt_file(path, filename, digest):
+    """
+    Like store_blob, for a file already on disk (an assembled chunked
+    upload): it is moved into place, or deleted when the bytes are known.
+    """
+    blob, stored = existing_blob(digest)
+    if stored:
+        os.remove(path)
+        return blob
+
+    name = upload_name(filename)
+    destination = default_storage.path(name)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(path, destination)
+    return save_blob(blob, digest, name)
+
+def save_blob(blob, digest, name):
+    size = default_storage.size(name)
+    if blob is not None:
+        # Re-stored copy of a blob whose file went missing
+        blob.file.name = name
+        blob.size = size
+        blob.save(update_fields=['file', 'size'])
+        return blob
+    try:
+        with transaction.atomic():
+            return DatasetBlob.objects.create(sha256=digest, revision=digest, file=name, size=size)
+    except IntegrityError:
+        # A concurrent upload of the same bytes created the blob first
+        default_storage.delete(name)
+        return DatasetBlob.objects.get(sha256=digest)
+
+def ensure_blob(dataset):
+    """
+    Returns the dataset's blob, hashing the file of a dataset stored
+    before deduplication (or whose file was missing when it was migrated).
+    """
+    if dataset.blob_id is None:
+        digest = file_sha256(dataset.file.path)
+        blob, _ = DatasetBlob.objects.get_or_create(
+            sha256=digest, defaults={'revision': digest, 'file': dataset.file.name, 'size': dataset.file.size})
+        dataset.blob = blob
+        dataset.save(update_fields=['blob'])
+    return dataset.blob
+
+def delete_blob_files(blob):
+    if blob.file.name:
+        default_storage.delete(blob.file.name)
+    if blob.columns_dir:
+        shutil.rmtree(os.path.join(settings.MEDIA_ROOT, blob.columns_dir), ignore_errors=True)
+
+def release_blobs(blob_ids):
+    """
+    Deletes the given blobs that no dataset references any more, with their
+    files, column stores and analyses (stored and cached). Returns the
+    number deleted.
+    """
+    orphans = DatasetBlob.objects.filter(id__in=set(blob_ids) - {None}, datasets__isnull=True)
+    count = 0
+    for blob in orphans:
+        key = analysis_key(blob, ANALYSIS_VERSION)
+        try:
+            blob.delete()
+        except ProtectedError:
+            # Picked up by a new upload in the meantime
+            continue
+        delete_blob_files(blob)
+        analysis_cache().delete(key)
+        count += 1
+    return count
+
+def delete_datasets(datasets):
+    """
+    Deletes a queryset of datasets, then any blobs left unreferenced.
+    Returns the number of datasets deleted.
+    """
+    blob_ids = list(datasets.values_list('blob_id', flat=True))
+    _, deleted = datasets.delete()
+    release_blobs(blob_ids)
+    return deleted.get(EquipmentDataset._meta.label, 0)
@@ -0,0 +1,92 @@
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+
+# Bump whenever the shape or the maths of the analysis result changes.
+# Stored analyses with an older version are recomputed on their next read.
+ANALYSIS_VERSION = 7
+
+HITS_KEY = 'analysis-stats:hits'
+MISSES_KEY = 'analysis-stats:misses'
+# How often a worker waiting on another worker's computation checks for the result
+WAIT_INTERVAL = 0.1
+
+def analysis_cache():
+    return caches['analysis']
+
+def meta_cache():
+    # Counters and compute_once locks; results are evicted, these must not be
+    return caches['analysis_meta']
+
+def analysis_key(blob, version):
+    # Results are per content, so every dataset sharing the blob shares the
+    # entry; the id keeps a blob re-created after pruning from reading it
+    return f'analysis:{blob.id}:{blob.revision}:v{version}'
+
+def count(key):
+    cache = meta_cache()
+    if not cache.add(key, 1, timeout=None):
+        cache.incr(key)
+
+def cached_result(key):
+    """
+    Returns the cached analysis result for `key`, or None, and counts the
+    hit or miss.
+    """
+    stats = analysis_cache().get(key)
+    count(HITS_KEY if stats is not None else MISSES_KEY)
+    return stats
+
+def compute_once(key, compute):
+    """
+    Runs `compute()` (returning (stats, error)) unless another worker
+    sharing the cache is already computing `key`, in which case its result
+    is awaited for up to ANALYSIS_CACHE_LOCK_SECONDS instead.
+
+    With the locmem backend this only spans the threads of one process;
+    the file backend spans every worker on the host.
+    """
+    cache = analysis_cache()
+    locks = meta_cache()
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + settings.ANALYSIS_CACHE_LOCK_SECONDS
+    while not locks.add(lock_key, token, timeout=settings.ANALYSIS_CACHE_LOCK_SECONDS):
+        if time.monotonic() >= deadline:
+            # The other worker is stuck or gone; compute here instead
+            break
+        time.sleep(WAIT_INTERVAL)
+        stats = cache.get(key)
+        if stats is not None:
+            return stats, None
+
+    try:
+        stats, error = compute()
+        if error is None:
+            cache.set(key, stats)
+        return stats, error
+    finally:
+        if locks.get(lock_key) == token:
+            locks.delete(lock_key)
+
+def cache_stats():
+    """
+    Hit/miss counters and current size of the analysis cache.
+    """
+    cache = analysis_cache()
+    hits = meta_cache().get(HITS_KEY, 0)
+    misses = meta_cache().get(MISSES_KEY, 0)
+    entries, used = cache.usage() if hasattr(cache, 'usage') else (None, None)
+    return {
+        "backend": settings.CACHES['analysis']['BACKEND'],
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "entries": entries,
+        "bytes": used,
+        "max_bytes": getattr(cache, 'max_bytes', None),
+    }
+
+def reset_stats():
+    meta_cache().delete_many([HITS_KEY, MISSES_KEY])
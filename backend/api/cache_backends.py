@@ -0,0 +1,164 @@
+import os
+import pickle
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: increments of the file backend are not serialized across processes
+    fcntl = None
+
+# Taken by SharedFileBasedCache.incr; not a cache entry (those end in .djcache)
+INCR_LOCK_FILE = 'incr.lock'
+
+# Bytes held by each named BudgetLocMemCache; like LocMemCache's own state,
+# shared by every instance (thread) using the same LOCATION
+_used_bytes = {}
+
+class BudgetLocMemCache(LocMemCache):
+    """
+    LocMemCache that also holds its pickled values under OPTIONS['MAX_BYTES'].
+
+    LocMemCache already keeps entries in least-recently-used order (reads
+    move an entry to the front); past the budget, entries are dropped from
+    the back until the rest fits. A running byte total, updated whenever an
+    entry is stored or removed, keeps each set O(1) plus what it evicts.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        options = params.get('OPTIONS', {})
+        self.max_bytes = int(options.get('MAX_BYTES', 0)) or None
+        self._name = name
+        _used_bytes.setdefault(name, 0)
+
+    def _set(self, key, value, timeout=None):
+        # Taken out first, so a cull cannot drop the old value and have it counted twice
+        old = self._cache.pop(key, None)
+        if old is not None:
+            _used_bytes[self._name] -= len(old)
+        super()._set(key, value, timeout)
+        _used_bytes[self._name] += len(value)
+        if self.max_bytes is None:
+            return
+        # Never evict the entry just stored, even when it alone exceeds the budget
+        while _used_bytes[self._name] > self.max_bytes and len(self._cache) > 1:
+            self._pop_oldest()
+
+    def _pop_oldest(self):
+        old_key, old_value = self._cache.popitem()
+        self._expire_info.pop(old_key, None)
+        _used_bytes[self._name] -= len(old_value)
+
+    def _cull(self):
+        if self._cull_frequency == 0:
+            self._clear()
+        else:
+            for _ in range(len(self._cache) // self._cull_frequency):
+                self._pop_oldest()
+
+    def _delete(self, key):
+        value = self._cache.get(key)
+        deleted = super()._delete(key)
+        if deleted:
+            _used_bytes[self._name] -= len(value)
+        return deleted
+
+    def incr(self, key, delta=1, version=None):
+        # LocMemCache.incr writes the new value past _set; this goes through it
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            if self._has_expired(key):
+                self._delete(key)
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(self._cache[key]) + delta
+            expiry = self._expire_info[key]
+            self._set(key, pickle.dumps(new_value, self.pickle_protocol))
+            self._expire_info[key] = expiry
+        return new_value
+
+    def _clear(self):
+        self._cache.clear()
+        self._expire_info.clear()
+        _used_bytes[self._name] = 0
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def usage(self):
+        with self._lock:
+            return len(self._cache), _used_bytes[self._name]
+
+class SharedFileBasedCache(FileBasedCache):
+    """
+    FileBasedCache whose add() and incr() are atomic across the processes
+    sharing the directory, for counters and locks.
+    """
+
+    def incr(self, key, delta=1, version=None):
+        # FileBasedCache reads the value, then writes the sum; an exclusive
+        # lock on a file next to the entries makes that one step
+        if fcntl is None:
+            return super().incr(key, delta, version)
+        self._createdir()
+        with open(os.path.join(self._dir, INCR_LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return super().incr(key, delta, version)
+
+class BudgetFileBasedCache(SharedFileBasedCache):
+    """
+    FileBasedCache shared by every process on the host, held under
+    OPTIONS['MAX_BYTES'] of files by deleting the least recently read ones.
+
+    Reads touch the file's modification time, so it orders entries by last use.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self.max_bytes = int(options.get('MAX_BYTES', 0)) or None
+
+    def get(self, key, default=None, version=None):
+        sentinel = object()
+        value = super().get(key, sentinel, version)
+        if value is sentinel:
+            return default
+        try:
+            os.utime(self._key_to_file(key, version))
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        super().set(key, value, timeout, version)
+        if self.max_bytes is not None:
+            self._evict(keep=self._key_to_file(key, version))
+
+    def _entries(self):
+        entries = []
+        for fname in self._list_cache_files():
+            try:
+                stat = os.stat(fname)
+            except FileNotFoundError:
+                # Deleted by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, fname))
+        return entries
+
+    def _evict(self, keep):
+        entries = self._entries()
+        used = sum(size for _, size, _ in entries)
+        for _, size, fname in sorted(entries):
+            if used <= self.max_bytes:
+                break
+            if fname == keep:
+                continue
+            self._delete(fname)
+            used -= size
+
+    def usage(self):
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
@@ -0,0 +1,267 @@
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .schema import PARAMETERS, read_csv_chunks, validate_csv
+
+# On-disk layout of a column store directory:
+#   meta.json        row count, Type categories and file names (written last)
+#   <param>.f8       raw little-endian float64 per parameter
+#   type.i4          int32 index into meta["types"], -1 for missing
+#   name.offsets     int64 start offsets into name.utf8, rows + 1 entries
+#   name.utf8        concatenated UTF-8 equipment names
+STORE_FORMAT = 1
+META_FILE = 'meta.json'
+FLOAT_DTYPE = np.dtype('<f8')
+CODE_DTYPE = np.dtype('<i4')
+OFFSET_DTYPE = np.dtype('<i8')
+# names() copies the whole byte span of the requested rows when it is at most
+# this many times the size of the names themselves
+NAME_SPAN_FACTOR = 4
+
+FLOAT_FILES = {column: f'{key}.f8' for key, column in PARAMETERS.items()}
+TYPE_FILE = 'type.i4'
+NAME_OFFSETS_FILE = 'name.offsets'
+NAME_DATA_FILE = 'name.utf8'
+
+class ColumnStore:
+    """
+    Read-only access to a dataset converted by write_column_store.
+    Columns are memory-mapped, so opening a store costs nothing and only
+    the pages actually touched are read from disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.rows = self.meta['rows']
+        self.types = self.meta['types']
+
+    def _map(self, filename, dtype, length):
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, filename), dtype=dtype, mode='r', shape=(length,))
+
+    def values(self, column):
+        """
+        float64 memmap of a parameter column ('Flowrate', 'Pressure', 'Temperature').
+        """
+        return self._map(FLOAT_FILES[column], FLOAT_DTYPE, self.rows)
+
+    def type_codes(self):
+        return self._map(TYPE_FILE, CODE_DTYPE, self.rows)
+
+    def name_offsets(self):
+        return self._map(NAME_OFFSETS_FILE, OFFSET_DTYPE, self.rows + 1)
+
+    def name_data(self):
+        """
+        uint8 memmap of all names concatenated, sliced by name_offsets().
+        """
+        total = int(self.name_offsets()[-1]) if self.rows else 0
+        return self._map(NAME_DATA_FILE, np.uint8, total)
+
+    def names(self, index=None):
+        """
+        Decoded equipment names for the given row positions (all rows if None).
+        """
+        offsets = self.name_offsets()
+        positions = np.arange(self.rows) if index is None else np.asarray(index)
+        if len(positions) == 0:
+            return []
+        starts, ends = offsets[positions], offsets[positions + 1]
+        data = self.name_data()
+        lo, hi = int(starts.min()), int(ends.max())
+        if hi - lo > NAME_SPAN_FACTOR * int((ends - starts).sum()):
+            # Scattered rows (e.g. a sorted page): copy only the names needed
+            return [bytes(data[s:e]).decode('utf-8') for s, e in zip(starts, ends)]
+        # Nearby rows: one copy of the span, then slice plain bytes
+        span = bytes(data[lo:hi])
+        return [span[s - lo:e - lo].decode('utf-8') for s, e in zip(starts.tolist(), ends.tolist())]
+
+    def type_labels(self, index=None):
+        codes = self.type_codes() if index is None else self.type_codes()[index]
+        labels = np.array(self.types + [None], dtype=object)
+        # Code -1 (missing) picks the trailing None
+        return labels[codes]
+
+    def frame(self, columns, index):
+        """
+        DataFrame of the requested columns for the given row positions.
+        """
+        data = {}
+        for column in columns:
+            if column == 'Equipment Name':
+                data[column] = self.names(index)
+            elif column == 'Type':
+                data[column] = self.type_labels(index)
+            else:
+                data[column] = np.asarray(self.values(column)[index])
+        return pd.DataFrame(data, columns=columns)
+
+    def sort_order(self, column, descending=False):
+        """
+        Row positions that sort the store by one column (stable, missing last).
+        """
+        if column == 'Equipment Name':
+            keys = self.names()
+        elif column == 'Type':
+            keys = self.type_labels()
+        else:
+            keys = self.values(column)
+        ordered = pd.Series(keys).sort_values(ascending=not descending, kind='stable', na_position='last')
+        return ordered.index.to_numpy()
+
+class ColumnWriter:
+    """
+    Appends DataFrame chunks (the required columns, canonical names) to the
+    column files of a store directory, dictionary-encoding Type against the
+    categories seen so far. Used both to build a store and to extend one.
+    """
+
+    def __init__(self, path, mode='wb', categories=None, name_bytes=0):
+        self.categories = dict(categories or {})
+        self.name_bytes = name_bytes
+        self.rows = 0
+        self.outputs = {column: open(os.path.join(path, filename), mode) for column, filename in FLOAT_FILES.items()}
+        self.outputs['Type'] = open(os.path.join(path, TYPE_FILE), mode)
+        self.outputs['offsets'] = open(os.path.join(path, NAME_OFFSETS_FILE), mode)
+        self.outputs['names'] = open(os.path.join(path, NAME_DATA_FILE), mode)
+
+    def write(self, chunk):
+        outputs = self.outputs
+        for column in FLOAT_FILES:
+            outputs[column].write(chunk[column].to_numpy(dtype=FLOAT_DTYPE).tobytes())
+
+        # Dictionary-encode Type against the categories seen so far
+        codes, uniques = pd.factorize(chunk['Type'])
+        for value in uniques:
+            self.categories.setdefault(str(value), len(self.categories))
+        lookup = np.array([self.categories[str(v)] for v in uniques] + [-1], dtype=CODE_DTYPE)
+        outputs['Type'].write(lookup[codes].tobytes())
+
+        names = chunk['Equipment Name'].fillna('').astype(str)
+        data = ''.join(names).encode('utf-8')
+        lengths = names.str.len().to_numpy(dtype=OFFSET_DTYPE)
+        if len(data) != lengths.sum():
+            # Non-ASCII names: byte lengths differ from character lengths
+            lengths = np.array([len(n.encode('utf-8')) for n in names], dtype=OFFSET_DTYPE)
+        offsets = self.name_bytes + np.cumsum(lengths)
+        outputs['offsets'].write(offsets.astype(OFFSET_DTYPE).tobytes())
+        outputs['names'].write(data)
+        if len(offsets):
+            self.name_bytes = int(offsets[-1])
+
+        self.rows += len(chunk)
+
+    def close(self):
+        for output in self.outputs.values():
+            output.close()
+
+def store_meta(rows, categories):
+    return {
+        "format": STORE_FORMAT,
+        "rows": rows,
+        "types": list(categories),
+        "columns": {
+            **FLOAT_FILES,
+            "Type": TYPE_FILE,
+            "Equipment Name": [NAME_OFFSETS_FILE, NAME_DATA_FILE],
+        },
+    }
+
+def write_meta(path, meta):
+    # Written to a temporary file and renamed, so readers see the old or the new meta
+    tmp = os.path.join(path, f'{META_FILE}.{uuid.uuid4().hex}')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, META_FILE))
+
+def write_column_store(csv_path, dest, chunk_rows, progress=None, engine=None):
+    """
+    Converts a CSV into a column store at `dest` in bounded-size chunks.
+    The header and first rows are validated before the full read, which
+    parses only the required columns with CSV_ENGINE (or `engine`).
+
+    The store is built in a sibling temporary directory and renamed into
+    place at the end, so a failed conversion never leaves a partial store
+    and concurrent conversions of the same file do not collide.
+    `progress`, if given, is called after every chunk with the bytes of the
+    file read so far, the file size and the parsed chunk (a DataFrame of the
+    required columns). Returns the opened ColumnStore.
+    """
+    tmp = f'{dest}.partial-{uuid.uuid4().hex}'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    size = os.path.getsize(csv_path) or 1
+
+    try:
+        writer = ColumnWriter(tmp)
+        try:
+            writer.outputs['offsets'].write(np.zeros(1, dtype=OFFSET_DTYPE).tobytes())
+
+            with open(csv_path, 'rb') as f:
+                columns, error = validate_csv(f)
+                if error:
+                    raise ValueError(error)
+                for chunk in read_csv_chunks(f, columns, chunk_rows, engine or settings.CSV_ENGINE):
+                    writer.write(chunk)
+                    if progress:
+                        progress(min(f.tell(), size), size, chunk)
+        finally:
+            writer.close()
+
+        if writer.rows == 0:
+            raise ValueError("CSV file contains no rows")
+
+        write_meta(tmp, store_meta(writer.rows, writer.categories))
+
+        try:
+            os.replace(tmp, dest)
+        except OSError:
+            if not os.path.exists(os.path.join(dest, META_FILE)):
+                raise
+            # Another conversion finished first; its store is identical
+            shutil.rmtree(tmp, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    return ColumnStore(dest)
+
+def append_column_store(path, f, chunk_rows, engine=None):
+    """
+    Appends the rows of a CSV (a binary file object) to the column store at
+    `path`, in O(new rows): the column files are extended and meta.json is
+    replaced last, so readers keep seeing the old row count until the new
+    rows are complete. Returns the reopened ColumnStore.
+    """
+    columns, error = validate_csv(f)
+    if error:
+        raise ValueError(error)
+
+    store = ColumnStore(path)
+    # Drop whatever an interrupted append left past the committed rows
+    for filename, dtype, length in [*((name, FLOAT_DTYPE, store.rows) for name in FLOAT_FILES.values()),
+                                    (TYPE_FILE, CODE_DTYPE, store.rows),
+                                    (NAME_OFFSETS_FILE, OFFSET_DTYPE, store.rows + 1)]:
+        os.truncate(os.path.join(path, filename), length * dtype.itemsize)
+    name_bytes = int(store.name_offsets()[-1]) if store.rows else 0
+    os.truncate(os.path.join(path, NAME_DATA_FILE), name_bytes)
+
+    writer = ColumnWriter(path, 'ab', {t: i for i, t in enumerate(store.types)}, name_bytes)
+    try:
+        for chunk in read_csv_chunks(f, columns, chunk_rows, engine or settings.CSV_ENGINE):
+            writer.write(chunk)
+    finally:
+        writer.close()
+
+    if writer.rows == 0:
+        raise ValueError("CSV file contains no rows")
+    write_meta(path, store_meta(store.rows + writer.rows, writer.categories))
+    return ColumnStore(path)
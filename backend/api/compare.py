@@ -0,0 +1,128 @@
+from django.db.models import F
+from .analysis import ANALYSIS_VERSION, get_analysis
+from .models import EquipmentDataset
+from .schema import PARAMETERS
+
+# Parts of a stored analysis a comparison reads, as JSON key lookups: the
+# database extracts them, so the stored rows and previews are never loaded
+AGGREGATE_FIELDS = {
+    'total_count': F('blob__analysis__result__total_count'),
+    'type_distribution': F('blob__analysis__result__type_distribution'),
+    'parameters': F('blob__analysis__result__stats__parameters'),
+    'by_type': F('blob__analysis__result__stats__by_type'),
+}
+
+def parse_dataset_ids(params):
+    """
+    Reads ?ids= (comma-separated dataset ids). Returns (ids, error); ids is
+    None when the option is absent, meaning the user's whole history.
+    """
+    raw = params.get('ids', '').strip()
+    if not raw:
+        return None, None
+    try:
+        ids = [int(part) for part in raw.split(',') if part.strip()]
+    except ValueError:
+        return None, "'ids' must be a comma-separated list of dataset ids"
+    return list(dict.fromkeys(ids)), None
+
+def rounded(value):
+    return None if value is None else round(value, 2)
+
+def delta(baseline, latest):
+    """
+    Change of one figure from the baseline to the latest dataset.
+    """
+    change = None if baseline is None or latest is None else latest - baseline
+    return {
+        "baseline": rounded(baseline),
+        "latest": rounded(latest),
+        "change": rounded(change),
+        "percent_change": rounded(change / abs(baseline) * 100) if change is not None and baseline else None,
+    }
+
+def load_aggregates(user, ids=None):
+    """
+    Stored per-dataset aggregates of the user's datasets (all of them, or
+    `ids`), oldest first, in one query. Datasets without an analysis of the
+    current ANALYSIS_VERSION are analyzed on the spot. Returns (rows, error).
+    """
+    datasets = EquipmentDataset.objects.filter(user=user)
+    if ids is not None:
+        datasets = datasets.filter(pk__in=ids)
+    rows = list(datasets.order_by('uploaded_at', 'id').values(
+        'id', 'filename', 'uploaded_at', version=F('blob__analysis__version'), **AGGREGATE_FIELDS))
+
+    for row in rows:
+        if row['version'] != ANALYSIS_VERSION:
+            stats, error = get_analysis(EquipmentDataset.objects.get(pk=row['id']))
+            if error:
+                return None, f"Dataset {row['id']}: {error}"
+            row.update(total_count=stats['total_count'], type_distribution=stats['type_distribution'],
+                       parameters=stats['stats']['parameters'], by_type=stats['stats']['by_type'])
+    return rows, None
+
+def compare(rows):
+    """
+    Trend and deltas over datasets ordered by upload time.
+
+    "series" has one point per dataset: its averages, per-Type averages and
+    counts, and the change of each average from the previous point.
+    "deltas" compares the latest dataset with the first (the baseline), per
+    parameter and per Type, with the lowest and highest average in between.
+    """
+    types = list(dict.fromkeys(t for row in rows for t in row['type_distribution']))
+
+    def mean(row, key, type_name=None):
+        stats = row['parameters'][key] if type_name is None else row['by_type'].get(type_name, {}).get(key)
+        return stats['mean'] if stats else None
+
+    series = []
+    for index, row in enumerate(rows):
+        previous = rows[index - 1] if index else None
+        series.append({
+            "file_id": row['id'],
+            "filename": row['filename'],
+            "uploaded_at": row['uploaded_at'],
+            "total_count": row['total_count'],
+            "averages": {key: rounded(mean(row, key)) for key in PARAMETERS},
+            "change": {
+                key: rounded(mean(row, key) - mean(previous, key))
+                if previous and mean(row, key) is not None and mean(previous, key) is not None else None
+                for key in PARAMETERS
+            },
+            "type_distribution": row['type_distribution'],
+            "by_type": {
+                t: {key: rounded(mean(row, key, t)) for key in PARAMETERS}
+                for t in types if t in row['by_type']
+            },
+        })
+
+    baseline, latest = rows[0], rows[-1]
+    parameters = {}
+    for key in PARAMETERS:
+        means = [m for m in (mean(row, key) for row in rows) if m is not None]
+        parameters[key] = {
+            **delta(mean(baseline, key), mean(latest, key)),
+            "min": rounded(min(means)) if means else None,
+            "max": rounded(max(means)) if means else None,
+        }
+
+    by_type = {
+        t: {
+            "count": delta(baseline['type_distribution'].get(t, 0), latest['type_distribution'].get(t, 0)),
+            **{key: delta(mean(baseline, key, t), mean(latest, key, t)) for key in PARAMETERS},
+        }
+        for t in types
+    }
+
+    return {
+        "series": series,
+        "deltas": {
+            "baseline": baseline['id'],
+            "latest": latest['id'],
+            "total_count": delta(baseline['total_count'], latest['total_count']),
+            "parameters": parameters,
+            "by_type": by_type,
+        },
+    }
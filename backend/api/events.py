@@ -0,0 +1,62 @@
+import time
+from django.conf import settings
+from .analysis import get_analysis
+from .models import AnalysisJob
+from .renderers import FastJSONRenderer
+from .serializers import AnalysisJobSerializer
+
+def server_event(event, data):
+    """
+    One Server-Sent Events message: an event name and a JSON payload.
+    """
+    return b'event: ' + event.encode() + b'\ndata: ' + FastJSONRenderer().render(data) + b'\n\n'
+
+def job_events(job, shape='rows'):
+    """
+    Yields the events of a background analysis job until it ends: "progress"
+    whenever its status or progress changes (with the rows and bytes parsed
+    and the aggregates so far), then "done" with the analysis result or
+    "failed" with the error.
+
+    The job row is read every JOB_EVENTS_POLL_SECONDS on the server, so the
+    client keeps one connection open instead of polling. A comment line is
+    sent every JOB_EVENTS_HEARTBEAT_SECONDS to keep proxies from closing an
+    idle stream; after JOB_EVENTS_TIMEOUT_SECONDS a "timeout" event ends it
+    and the client reconnects.
+    """
+    started = heartbeat = time.monotonic()
+    last = None
+    while True:
+        state = (job.status, job.progress)
+        if state != last:
+            last = state
+            yield server_event('progress', AnalysisJobSerializer(job).data)
+
+        if job.status == AnalysisJob.STATUS_DONE:
+            if job.dataset is None:
+                yield server_event('failed', {"error": "Dataset no longer exists"})
+                return
+            result, error = get_analysis(job.dataset, shape=shape)
+            if error:
+                yield server_event('failed', {"error": error})
+            else:
+                yield server_event('done', result)
+            return
+        if job.status == AnalysisJob.STATUS_FAILED:
+            yield server_event('failed', {"error": job.error})
+            return
+
+        now = time.monotonic()
+        if now - started >= settings.JOB_EVENTS_TIMEOUT_SECONDS:
+            yield server_event('timeout', AnalysisJobSerializer(job).data)
+            return
+        if now - heartbeat >= settings.JOB_EVENTS_HEARTBEAT_SECONDS:
+            heartbeat = now
+            yield b': keep-alive\n\n'
+
+        time.sleep(settings.JOB_EVENTS_POLL_SECONDS)
+        try:
+            job = AnalysisJob.objects.select_related('dataset').get(pk=job.pk)
+        except AnalysisJob.DoesNotExist:
+            yield server_event('failed', {"error": "Job not found"})
+            return
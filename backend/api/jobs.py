@@ -0,0 +1,94 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .analysis import RunningAggregates, get_analysis
+from .blobs import delete_datasets
+from .models import AnalysisJob, EquipmentDataset
+from .schema import PARAMETERS
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """
+    Returns the process-wide worker pool, created on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ANALYSIS_WORKERS,
+                thread_name_prefix='analysis',
+            )
+    return _executor
+
+def submit_analysis(dataset, user):
+    """
+    Creates a pending job for the dataset and queues it once the current
+    transaction commits, so the worker always sees the saved rows.
+    """
+    job = AnalysisJob.objects.create(user=user, dataset=dataset)
+    transaction.on_commit(lambda: get_executor().submit(run_analysis_job, job.pk))
+    return job
+
+def update_job(job_id, **fields):
+    """
+    Single UPDATE of a job row; bumps updated_at, which .update() skips.
+    """
+    AnalysisJob.objects.filter(pk=job_id).update(updated_at=timezone.now(), **fields)
+
+def partial_result(aggregates, bytes_read, total_bytes):
+    """
+    What a running job reports: rows and bytes parsed so far and the
+    aggregates of those rows (JSON has no NaN; empty averages are null).
+    """
+    return {
+        "rows": aggregates.rows,
+        "bytes": bytes_read,
+        "total_bytes": total_bytes,
+        "averages": {key: None if math.isnan(value) else value for key, value in aggregates.averages().items()},
+        "type_distribution": aggregates.type_distribution(),
+    }
+
+def run_analysis_job(job_id):
+    """
+    Runs get_analysis for a job on a worker thread and records the outcome.
+    """
+    close_old_connections()
+    try:
+        job = AnalysisJob.objects.select_related('dataset').get(pk=job_id)
+        dataset = job.dataset
+        if dataset is None:
+            update_job(job_id, status=AnalysisJob.STATUS_FAILED, error="Dataset no longer exists")
+            return
+
+        update_job(job_id, status=AnalysisJob.STATUS_RUNNING)
+
+        last_reported = [0]
+        aggregates = RunningAggregates()
+        def report(bytes_read, total_bytes, chunk):
+            aggregates.update(
+                len(chunk),
+                {key: chunk[column].to_numpy(dtype=float) for key, column in PARAMETERS.items()},
+                chunk['Type'].value_counts(sort=False).to_dict(),
+            )
+            # Only write to the database when the whole percentage changes
+            percent = int(bytes_read / total_bytes * 99)
+            if percent > last_reported[0]:
+                last_reported[0] = percent
+                update_job(job_id, progress=percent, partial=partial_result(aggregates, bytes_read, total_bytes))
+
+        stats, error = get_analysis(dataset, progress=report)
+
+        if error:
+            delete_datasets(EquipmentDataset.objects.filter(pk=dataset.pk))
+            update_job(job_id, status=AnalysisJob.STATUS_FAILED, error=error)
+        else:
+            update_job(job_id, status=AnalysisJob.STATUS_DONE, progress=100, partial=None)
+    except Exception as e:
+        update_job(job_id, status=AnalysisJob.STATUS_FAILED, error=str(e))
+    finally:
+        close_old_connections()
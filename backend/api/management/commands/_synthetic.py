@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+TYPES = ['Pump', 'Compressor', 'Valve', 'HeatExchanger', 'Reactor', 'Condenser']
+
+def write_synthetic_csv(path, rows, chunk_rows=200000, seed=0):
+    """
+    Writes an equipment CSV with `rows` random rows, chunk by chunk so the
+    generator itself stays small in memory.
+    """
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, 'w', newline='') as f:
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            index = np.arange(written, written + n)
+            types = rng.choice(TYPES, size=n)
+            chunk = pd.DataFrame({
+                'Equipment Name': [f"{t}-{i}" for t, i in zip(types, index)],
+                'Type': types,
+                'Flowrate': rng.normal(120, 30, n).round(1),
+                'Pressure': rng.normal(6, 1.5, n).round(2),
+                'Temperature': rng.normal(115, 15, n).round(1),
+            })
+            chunk.to_csv(f, header=(written == 0), index=False)
+            written += n
+    return path
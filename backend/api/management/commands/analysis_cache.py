@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from api.cache import analysis_cache, cache_stats, reset_stats
+
+class Command(BaseCommand):
+    help = ("Shows the analysis cache's hit/miss counters and size. Counters of the locmem "
+            "backend live in each server process; use the file backend to see them here.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help="Empty the cache, counters included")
+        parser.add_argument('--reset-stats', action='store_true', help="Zero the hit/miss counters")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            analysis_cache().clear()
+        if options['clear'] or options['reset_stats']:
+            reset_stats()
+        self.stdout.write(", ".join(f"{name}: {value}" for name, value in cache_stats().items()))
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from django.core.management.base import BaseCommand
+from api.analysis import summarize_store
+from api.columnar import ColumnStore, write_column_store
+from api.schema import PARAMETERS, clean_columns, pa, validate_csv
+from api.statistics import compute_statistics
+from ._synthetic import write_synthetic_csv
+
+def measure(func, *args):
+    # Timed and traced in separate runs; tracemalloc slows allocation-heavy code
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def read_csv_summary(path):
+    # The original approach: parse the whole file into one DataFrame
+    df = pd.read_csv(path)
+    clean_columns(df)
+    return {
+        "averages": {key: round(float(df[column].mean()), 2) for key, column in PARAMETERS.items()},
+        "type_distribution": {str(k): int(v) for k, v in df['Type'].value_counts().items()},
+    }
+
+def ingest(path, dest, chunk_rows, engine):
+    return summarize_store(write_column_store(path, dest, chunk_rows, engine=engine))
+
+def validate(path):
+    with open(path, 'rb') as f:
+        return validate_csv(f)
+
+def write_bad_csv(path, source):
+    # The source file with text in a numeric column of its first row
+    with open(source, 'rb') as src, open(path, 'wb') as dst:
+        dst.write(src.readline())
+        dst.write(b'Bad-0,Pump,high,6.0,115.0\n')
+        shutil.copyfileobj(src, dst)
+    return path
+
+def reject(path):
+    # A file whose numeric column holds text: refused from the sample alone
+    with open(path, 'rb') as f:
+        _, error = validate_csv(f)
+    return error
+
+def reanalyze(dest):
+    return summarize_store(ColumnStore(dest))
+
+def statistics(dest):
+    return compute_statistics(ColumnStore(dest))
+
+class Command(BaseCommand):
+    help = ("Compares a full pd.read_csv analysis with chunked ingest into a column store "
+            "and with re-analysis of the stored, memory-mapped columns. 'stats' is the "
+            "extended statistics part of the analysis on its own. 'validate' is the header "
+            "and sample check every upload gets, 'reject' the same on a file with a bad value.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[100000, 500000, 2000000])
+        parser.add_argument('--chunk-rows', type=int, default=100000)
+        parser.add_argument('--engine', nargs='+', choices=['c', 'pyarrow'],
+                            default=['c', 'pyarrow'] if pa is not None else ['c'],
+                            help="CSV engines to time the ingest with")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>10} {'MB':>8} {'mode':>15} {'seconds':>9} {'peak MB':>9} {'ns/row':>8}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for rows in options['rows']:
+                path = write_synthetic_csv(os.path.join(tmp, f'bench_{rows}.csv'), rows)
+                dest = os.path.join(tmp, f'columns_{rows}')
+                size_mb = os.path.getsize(path) / 1e6
+
+                bad = write_bad_csv(os.path.join(tmp, f'bad_{rows}.csv'), path)
+
+                results = []
+                timings = []
+                full, full_time, full_peak = measure(read_csv_summary, path)
+                timings.append(('read_csv', full_time, full_peak))
+                for engine in options['engine']:
+                    shutil.rmtree(dest, ignore_errors=True)
+                    ingested, ingest_time, ingest_peak = measure(ingest, path, dest, options['chunk_rows'], engine)
+                    results.append(ingested)
+                    timings.append((f'ingest-{engine}', ingest_time, ingest_peak))
+                stored, stored_time, stored_peak = measure(reanalyze, dest)
+                results.append(stored)
+                timings.append(('columnar', stored_time, stored_peak))
+                _, stats_time, stats_peak = measure(statistics, dest)
+                timings.append(('stats', stats_time, stats_peak))
+                _, validate_time, validate_peak = measure(validate, path)
+                timings.append(('validate', validate_time, validate_peak))
+                error, reject_time, reject_peak = measure(reject, bad)
+                timings.append(('reject', reject_time, reject_peak))
+                if not error:
+                    self.stderr.write(f"The bad file of {rows} rows was not rejected")
+
+                for mode, elapsed, peak in timings:
+                    self.stdout.write(f"{rows:>10} {size_mb:>8.1f} {mode:>15} {elapsed:>9.3f} "
+                                      f"{peak / 1e6:>9.1f} {elapsed / rows * 1e9:>8.0f}")
+                self.stdout.write(f"{'':>10} {'':>8} {'speedup':>15} {full_time / stored_time:>8.1f}x")
+
+                for result in results:
+                    if (result['averages'] != full['averages']
+                            or result['type_distribution'] != full['type_distribution']):
+                        self.stderr.write(f"Results differ for {rows} rows")
+                os.remove(path)
+                os.remove(bad)
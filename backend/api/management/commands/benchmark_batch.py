@@ -0,0 +1,54 @@
+import os
+import tempfile
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.batch import analyze_csv, make_pool
+from ._synthetic import write_synthetic_csv
+
+def run(pool, paths, tmp, engine):
+    futures = [pool.submit(analyze_csv, path, os.path.join(tmp, f'columns_{i}'), settings.ANALYSIS_CHUNK_ROWS, engine)
+               for i, path in enumerate(paths)]
+    return [future.result() for future in futures]
+
+class Command(BaseCommand):
+    help = ("Analyzes a batch of CSVs one after another and on process pools of increasing "
+            "size, the way upload/batch/ does, and reports the speedup over one process.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=8)
+        parser.add_argument('--rows', type=int, default=200000, help="Rows per file")
+        parser.add_argument('--workers', type=int, nargs='+',
+                            default=sorted({1, 2, 4, os.cpu_count() or 1}))
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'files':>6} {'rows':>9} {'workers':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8}")
+        with tempfile.TemporaryDirectory() as tmp:
+            # Distinct seeds, so no two files have the same bytes
+            paths = [write_synthetic_csv(os.path.join(tmp, f'unit_{i}.csv'), options['rows'], seed=i)
+                     for i in range(options['files'])]
+            total = options['files'] * options['rows']
+            warmup = write_synthetic_csv(os.path.join(tmp, 'warmup.csv'), 100)
+
+            started = time.perf_counter()
+            for i, path in enumerate(paths):
+                _, error = analyze_csv(path, os.path.join(tmp, f'serial_{i}'), settings.ANALYSIS_CHUNK_ROWS,
+                                       settings.CSV_ENGINE)
+                if error:
+                    self.stderr.write(error)
+            serial = time.perf_counter() - started
+            self.stdout.write(f"{options['files']:>6} {total:>9} {'serial':>8} {serial:>9.3f} "
+                              f"{total / serial:>12,.0f} {1:>7.1f}x")
+
+            for workers in options['workers']:
+                with make_pool(workers) as pool:
+                    # Warm every worker up first: spawning and imports are a one-off cost
+                    # of the server process, not of each batch
+                    run(pool, [warmup] * workers, os.path.join(tmp, f'warmup_{workers}'), settings.CSV_ENGINE)
+                    started = time.perf_counter()
+                    results = run(pool, paths, os.path.join(tmp, f'pool_{workers}'), settings.CSV_ENGINE)
+                    elapsed = time.perf_counter() - started
+                if any(error for _, error in results):
+                    self.stderr.write(f"Errors with {workers} workers")
+                self.stdout.write(f"{options['files']:>6} {total:>9} {workers:>8} {elapsed:>9.3f} "
+                                  f"{total / elapsed:>12,.0f} {serial / elapsed:>7.1f}x")
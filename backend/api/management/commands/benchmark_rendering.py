@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from api.analysis import StoreRecords
+from api.columnar import write_column_store
+from api.renderers import ArrowStreamRenderer, FastJSONRenderer, MessagePackRenderer, msgpack, orjson, pa
+from ._synthetic import write_synthetic_csv
+
+def timed(func, *args, repeat=3):
+    # Best of `repeat` runs, so a stray GC pause does not skew one format
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def rows_page(records):
+    return list(records[0:len(records)])
+
+def columnar_page(records):
+    return records.columnar(0, len(records))
+
+def decode_json(body):
+    # What a client does to get numeric arrays out of a JSON page
+    results = json.loads(body)['results']
+    if isinstance(results, list):
+        return np.array([row['Flowrate'] for row in results], dtype=float)
+    return np.asarray(results['data']['Flowrate'], dtype=float)
+
+def decode_msgpack(body):
+    page = msgpack.unpackb(body, ext_hook=lambda code, data: np.frombuffer(data, '<f8'))
+    return page['results']['data']['Flowrate']
+
+def decode_arrow(body):
+    return pa.ipc.open_stream(body).read_all().column('Flowrate').to_numpy()
+
+class Command(BaseCommand):
+    help = ("Compares building, serializing and decoding a records page as row dicts with "
+            "DRF's JSONRenderer against the columnar shape with orjson, MessagePack and Arrow.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[5000, 50000, 500000])
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write("orjson is not installed; the fast renderer falls back to DRF's encoder")
+        cases = [
+            ('rows', rows_page, 'drf', JSONRenderer(), decode_json),
+            ('rows', rows_page, 'fast', FastJSONRenderer(), decode_json),
+            ('columnar', columnar_page, 'drf', JSONRenderer(), decode_json),
+            ('columnar', columnar_page, 'fast', FastJSONRenderer(), decode_json),
+        ]
+        if msgpack is not None:
+            cases.append(('columnar', columnar_page, 'msgpack', MessagePackRenderer(), decode_msgpack))
+        if pa is not None:
+            cases.append(('columnar', columnar_page, 'arrow', ArrowStreamRenderer(), decode_arrow))
+
+        self.stdout.write(f"{'rows':>8} {'shape':>9} {'renderer':>9} {'build s':>8} {'render s':>9} "
+                          f"{'rows/s':>11} {'MB':>7} {'decode s':>9}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for rows in options['rows']:
+                path = write_synthetic_csv(os.path.join(tmp, f'bench_{rows}.csv'), rows)
+                store = write_column_store(path, os.path.join(tmp, f'columns_{rows}'), 100000)
+                records = StoreRecords(store)
+                pages = {}
+
+                for shape, build, name, renderer, decode in cases:
+                    if shape not in pages:
+                        pages[shape] = timed(build, records)
+                    page, build_time = pages[shape]
+                    body, render_time = timed(renderer.render, {"results": page})
+                    values, decode_time = timed(decode, body)
+                    if not np.allclose(values, store.values('Flowrate'), equal_nan=True):
+                        self.stderr.write(f"{name} decodes to different values for {rows} rows")
+                    total = build_time + render_time
+                    self.stdout.write(
+                        f"{rows:>8} {shape:>9} {name:>9} {build_time:>8.3f} {render_time:>9.3f} "
+                        f"{rows / total:>11,.0f} {len(body) / 1e6:>7.2f} {decode_time:>9.4f}")
+                os.remove(path)
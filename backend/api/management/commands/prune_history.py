@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from api.retention import sweep
+
+class Command(BaseCommand):
+    help = ("Removes history beyond HISTORY_RETENTION_LIMIT per user together with its stored "
+            "files, column stores and analyses, plus old jobs and idle chunked uploads. "
+            "Run periodically, e.g. from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Entries kept per user (default: HISTORY_RETENTION_LIMIT)")
+
+    def handle(self, *args, **options):
+        removed = sweep(options['limit'])
+        self.stdout.write(", ".join(f"{name}: {count}" for name, count in removed.items()))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from api.retention import remove_orphan_files
+
+class Command(BaseCommand):
+    help = ("Deletes stored CSVs and column stores that no upload refers to any more, e.g. "
+            "duplicate copies of identical files kept when uploads were first deduplicated.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age-hours', type=int, default=24,
+                            help="Only remove files untouched for this long (default: 24)")
+
+    def handle(self, *args, **options):
+        removed = remove_orphan_files(options['min_age_hours'])
+        self.stdout.write(", ".join(f"{name}: {count}" for name, count in removed.items()))
@@ -0,0 +1,147 @@
+import gzip
+import tempfile
+import zlib
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+READ_BLOCK = 64 * 1024
+# Response types worth compressing; the binary row formats still carry text names
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/msgpack', 'application/vnd.apache.arrow.stream')
+
+class GzipRequestMiddleware:
+    """
+    Accepts request bodies sent with `Content-Encoding: gzip`.
+
+    The body is inflated block by block into a spooled temporary file that
+    replaces the request stream, so the multipart parser and upload handlers
+    see the plain body with its real length. Bodies inflating past
+    GZIP_UPLOAD_MAX_BYTES are rejected.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding == 'gzip':
+            error = self.inflate(request)
+            if error:
+                return error
+        return self.get_response(request)
+
+    def inflate(self, request):
+        body = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        size = 0
+        try:
+            with gzip.GzipFile(fileobj=request._stream, mode='rb') as source:
+                while True:
+                    block = source.read(READ_BLOCK)
+                    if not block:
+                        break
+                    size += len(block)
+                    if size > settings.GZIP_UPLOAD_MAX_BYTES:
+                        body.close()
+                        return JsonResponse({"error": "Decompressed request body is too large"}, status=413)
+                    body.write(block)
+        except (OSError, EOFError, zlib.error):
+            body.close()
+            return JsonResponse({"error": "Request body is not valid gzip data"}, status=400)
+
+        body.seek(0)
+        request._stream = body
+        request.META['CONTENT_LENGTH'] = str(size)
+        del request.META['HTTP_CONTENT_ENCODING']
+        return None
+
+def cache_compressed(view):
+    """
+    Marks a view's responses for CompressionMiddleware's cache: their
+    compressed bodies are kept by ETag and reused by later responses
+    carrying the same ETag.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = view(*args, **kwargs)
+        response.cache_compressed = True
+        return response
+    return wrapper
+
+def accepted_encodings(header):
+    """
+    Content codings from an Accept-Encoding header, without those sent with q=0.
+    """
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+class CompressionMiddleware:
+    """
+    Compresses API responses of at least COMPRESSION_MIN_BYTES with brotli
+    (when installed and accepted) or gzip.
+
+    Bodies of views marked with cache_compressed are kept in the
+    'compressed' cache under their encoding and ETag, so repeat reads of
+    the same analysis skip the compression. Strong ETags are weakened, as
+    Django's GZipMiddleware does, since the bytes now differ per encoding.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        etag = response.get('ETag')
+        key = None
+        if getattr(response, 'cache_compressed', False) and etag and settings.COMPRESSION_CACHE_MAX_BYTES:
+            key = f'{encoding}:{etag}'
+        body = caches['compressed'].get(key) if key else None
+        if body is None:
+            body = compress(response.content, encoding)
+            if key:
+                caches['compressed'].set(key, body)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        if etag and not etag.startswith('W/'):
+            response['ETag'] = f'W/{etag}'
+        return response
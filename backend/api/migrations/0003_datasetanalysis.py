@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_equipmentdataset_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('result', models.JSONField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analysis', to='api.equipmentdataset')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='columns_dir',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
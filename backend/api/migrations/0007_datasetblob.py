@@ -0,0 +1,35 @@
+# Generated by Django 4.2.27 on 2026-10-17 05:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(upload_to='uploads/')),
+                ('size', models.BigIntegerField()),
+                ('columns_dir', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='datasets', to='api.datasetblob'),
+        ),
+        migrations.AddField(
+            model_name='datasetanalysis',
+            name='blob',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='analysis', to='api.datasetblob'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+import hashlib
+import os
+from django.conf import settings
+from django.db import migrations
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def link_blobs(apps, schema_editor):
+    """
+    Gives every existing dataset a blob, and moves each stored analysis
+    from its dataset to the dataset's blob. Files are left alone: copies of
+    bytes another blob already holds are removed by
+    `manage.py remove_orphan_files`.
+    """
+    EquipmentDataset = apps.get_model('api', 'EquipmentDataset')
+    DatasetBlob = apps.get_model('api', 'DatasetBlob')
+    DatasetAnalysis = apps.get_model('api', 'DatasetAnalysis')
+
+    for dataset in EquipmentDataset.objects.filter(blob__isnull=True).order_by('uploaded_at'):
+        path = os.path.join(settings.MEDIA_ROOT, dataset.file.name)
+        if not os.path.exists(path):
+            # Linked on first use if the file turns up again
+            continue
+        digest = file_sha256(path)
+        blob = DatasetBlob.objects.filter(sha256=digest).first()
+        if blob is None:
+            blob = DatasetBlob.objects.create(
+                sha256=digest, file=dataset.file.name, size=os.path.getsize(path),
+                columns_dir=dataset.columns_dir,
+            )
+        dataset.blob = blob
+        dataset.save(update_fields=['blob'])
+
+    for analysis in DatasetAnalysis.objects.select_related('dataset'):
+        blob_id = analysis.dataset.blob_id
+        if blob_id is None or DatasetAnalysis.objects.filter(blob_id=blob_id).exists():
+            analysis.delete()
+        else:
+            analysis.blob_id = blob_id
+            analysis.save(update_fields=['blob'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_datasetblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_blobs, migrations.RunPython.noop),
+    ]
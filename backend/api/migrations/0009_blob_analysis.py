@@ -0,0 +1,27 @@
+# Generated by Django 4.2.27 on 2026-10-17 05:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_link_dataset_blobs'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='datasetanalysis',
+            name='dataset',
+        ),
+        migrations.AlterField(
+            model_name='datasetanalysis',
+            name='blob',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analysis', to='api.datasetblob'),
+        ),
+        migrations.RemoveField(
+            model_name='equipmentdataset',
+            name='columns_dir',
+        ),
+    ]
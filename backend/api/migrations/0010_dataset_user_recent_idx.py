@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_blob_analysis'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipmentdataset',
+            index=models.Index(fields=['user', '-uploaded_at'], name='dataset_user_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_dataset_user_recent_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='partial',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
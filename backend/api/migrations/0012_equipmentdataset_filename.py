@@ -0,0 +1,31 @@
+# Generated by Django 4.2.27 on 2026-10-17 09:40
+
+import os
+from django.db import migrations, models
+
+
+def fill_filenames(apps, schema_editor):
+    """
+    Existing entries only kept the stored name; it is the best record of
+    what was uploaded.
+    """
+    EquipmentDataset = apps.get_model('api', 'EquipmentDataset')
+    for dataset in EquipmentDataset.objects.filter(filename=''):
+        dataset.filename = os.path.basename(dataset.file.name)
+        dataset.save(update_fields=['filename'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_analysisjob_partial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='filename',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(fill_filenames, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.27 on 2026-10-17 10:15
+
+import hashlib
+import os
+from django.conf import settings
+from django.db import migrations, models
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fill_revisions(apps, schema_editor):
+    """
+    Keeps each blob's digest as its revision, so cached analyses and ETags
+    stay valid. Blobs with appended rows held a chained digest in sha256;
+    it is replaced by the SHA-256 of their file.
+    """
+    DatasetBlob = apps.get_model('api', 'DatasetBlob')
+    for blob in DatasetBlob.objects.all():
+        blob.revision = blob.sha256
+        path = os.path.join(settings.MEDIA_ROOT, blob.file.name)
+        if os.path.exists(path):
+            digest = file_sha256(path)
+            if digest != blob.sha256 and not DatasetBlob.objects.filter(sha256=digest).exists():
+                blob.sha256 = digest
+        blob.save(update_fields=['revision', 'sha256'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_equipmentdataset_filename'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetblob',
+            name='revision',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_revisions, migrations.RunPython.noop),
+    ]
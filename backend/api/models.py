@@ -1,12 +1,93 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
 
+class DatasetBlob(models.Model):
+    # One stored CSV per distinct content, shared by every upload of the same bytes
+    sha256 = models.CharField(max_length=64, unique=True)
+    # Keys the cached analysis and ETags: the upload's SHA-256, chained with the
+    # SHA-256 of each batch of appended rows, so it changes with the content
+    revision = models.CharField(max_length=64)
+    file = models.FileField(upload_to='uploads/')
+    size = models.BigIntegerField()
+    # Column store built from the CSV at ingest, relative to MEDIA_ROOT
+    columns_dir = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Blob {self.sha256[:12]} ({self.size} bytes)"
+
 class EquipmentDataset(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True)
     # Stores the uploaded CSV file
     file = models.FileField(upload_to='uploads/')
+    # Name of the file as this user uploaded it; the stored file may carry another user's name
+    filename = models.CharField(max_length=255, blank=True)
     # Automatically records when the file was uploaded
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Stored content; `file` names the same file. Blobs are only deleted once unreferenced
+    blob = models.ForeignKey(DatasetBlob, on_delete=models.PROTECT, null=True, related_name='datasets')
+
+    class Meta:
+        # Serves both the history list and retention pruning (newest first per user)
+        indexes = [models.Index(fields=['user', '-uploaded_at'], name='dataset_user_recent_idx')]
+
+    def __str__(self):
+        return f"Dataset uploaded at {self.uploaded_at}"
+
+class DatasetAnalysis(models.Model):
+    # Cached result of analyze_dataset, written once per distinct file content
+    blob = models.OneToOneField(DatasetBlob, on_delete=models.CASCADE, related_name='analysis')
+    # ANALYSIS_VERSION the result was computed with
+    version = models.PositiveIntegerField()
+    result = models.JSONField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Analysis v{self.version} of blob {self.blob_id}"
+
+class AnalysisJob(models.Model):
+    # Background analysis of an uploaded dataset, polled by the client
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Kept when the dataset is removed so a failed job can still be reported
+    dataset = models.ForeignKey(EquipmentDataset, on_delete=models.SET_NULL, null=True, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # Percentage 0-100
+    progress = models.PositiveSmallIntegerField(default=0)
+    # While running: rows and bytes parsed so far and the running aggregates
+    # (averages, type_distribution) of those rows
+    partial = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Analysis job {self.id} ({self.status})"
+
+class UploadSession(models.Model):
+    # Resumable upload: the client PUTs the file in chunks, then finalizes it
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    # Declared total size in bytes and SHA-256 hex digest of the whole file
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    # Bytes stored so far; the next chunk must start at this offset
+    received = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Dataset uploaded at {self.uploaded_at}"
\ No newline at end of file
+        return f"Upload {self.id} ({self.received}/{self.size} bytes)"
@@ -0,0 +1,20 @@
+from rest_framework.pagination import LimitOffsetPagination
+from .analysis import RECORDS_PAGE_SIZE
+
+class RecordsPagination(LimitOffsetPagination):
+    """
+    Offset pagination for dataset rows: ?offset=<n>&limit=<n>.
+    """
+    default_limit = RECORDS_PAGE_SIZE
+    max_limit = 5000
+
+    def paginate_columns(self, records, request, view=None):
+        """
+        paginate_queryset for ?shape=columnar: returns the page of a
+        StoreRecords as one {"columns": ..., "data": ...} dict.
+        """
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.count = self.get_count(records)
+        self.offset = self.get_offset(request)
+        return records.columnar(self.offset, self.offset + self.limit)
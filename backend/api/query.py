@@ -0,0 +1,134 @@
+import math
+import numpy as np
+from .analysis import RunningAggregates, StoreRecords, open_store
+from .schema import PARAMETERS
+
+# ?<key>_min= / ?<key>_max= bounds accepted by the query endpoint, per parameter
+RANGE_PARAMS = {
+    f'{key}_{bound}': (column, bound)
+    for key, column in PARAMETERS.items()
+    for bound in ('min', 'max')
+}
+
+def parse_filters(params):
+    """
+    Reads the filter options of the query endpoint: ?name= (substring,
+    case-insensitive), ?type= ('All' or empty for any) and the
+    <parameter>_min / <parameter>_max bounds. Returns (filters, error).
+    """
+    filters = {
+        'name': params.get('name', '').strip(),
+        'type': params.get('type', '').strip(),
+        'ranges': [],
+    }
+    if filters['type'] == 'All':
+        filters['type'] = ''
+
+    for param, (column, bound) in RANGE_PARAMS.items():
+        raw = params.get(param, '').strip()
+        if not raw:
+            continue
+        try:
+            value = float(raw)
+        except ValueError:
+            return None, f"'{param}' must be a number"
+        filters['ranges'].append((column, bound, value))
+
+    return filters, None
+
+def ascii_lower(array):
+    """
+    Lowercases A-Z in a uint8 array; other bytes are left untouched.
+    """
+    upper = (array >= ord('A')) & (array <= ord('Z'))
+    return np.where(upper, array + 32, array).astype(np.uint8)
+
+def name_contains(store, term):
+    """
+    Boolean mask of rows whose name contains `term` (ASCII case-insensitive).
+
+    The needle is matched against the whole concatenated name buffer with one
+    vectorized comparison per needle byte; match positions are then mapped
+    back to rows through the offsets, dropping matches that span two names.
+    """
+    needle = ascii_lower(np.frombuffer(term.encode('utf-8'), dtype=np.uint8))
+    offsets = store.name_offsets()
+    total = int(offsets[-1])
+    width = len(needle)
+    mask = np.zeros(store.rows, dtype=bool)
+    if width == 0:
+        mask[:] = True
+        return mask
+    if total < width:
+        return mask
+
+    data = ascii_lower(np.asarray(store.name_data()))
+    span = total - width + 1
+    hits = data[:span] == needle[0]
+    for k in range(1, width):
+        hits &= data[k:span + k] == needle[k]
+
+    starts = np.flatnonzero(hits)
+    rows = np.searchsorted(offsets, starts, side='right') - 1
+    inside = starts + width <= offsets[rows + 1]
+    mask[rows[inside]] = True
+    return mask
+
+def filter_mask(store, filters):
+    """
+    Evaluates all filters as boolean masks over the stored columns.
+    """
+    mask = np.ones(store.rows, dtype=bool)
+
+    if filters['type']:
+        if filters['type'] in store.types:
+            mask &= store.type_codes() == store.types.index(filters['type'])
+        else:
+            mask[:] = False
+
+    for column, bound, value in filters['ranges']:
+        values = store.values(column)
+        # NaN compares False, so rows missing a bounded parameter are excluded
+        mask &= (values >= value) if bound == 'min' else (values <= value)
+
+    if filters['name']:
+        mask &= name_contains(store, filters['name'])
+
+    return mask
+
+def summarize_selection(store, mask):
+    """
+    total_count, averages and type_distribution of the selected rows.
+    """
+    aggregates = RunningAggregates()
+    codes = store.type_codes()[mask]
+    counts = np.bincount(codes[codes >= 0], minlength=len(store.types))
+    aggregates.type_counts = {t: 0 for t in store.types}
+    aggregates.update(
+        int(np.count_nonzero(mask)),
+        {key: np.asarray(store.values(column)[mask]) for key, column in PARAMETERS.items()},
+        dict(zip(store.types, counts)),
+    )
+    return {
+        "total_count": aggregates.rows,
+        "averages": {
+            key: None if math.isnan(value) else value for key, value in aggregates.averages().items()
+        },
+        "type_distribution": {t: n for t, n in aggregates.type_distribution().items() if n},
+    }
+
+def query_dataset(dataset, filters, columns=None, ordering=None):
+    """
+    Applies the filters to a dataset's column store.
+    Returns (StoreRecords over the matching rows, summary of those rows).
+    """
+    store = open_store(dataset)
+    mask = filter_mask(store, filters)
+
+    if ordering:
+        order = store.sort_order(ordering.lstrip('-'), descending=ordering.startswith('-'))
+        positions = order[mask[order]]
+    else:
+        positions = np.flatnonzero(mask)
+
+    return StoreRecords(store, columns, positions), summarize_selection(store, mask)
@@ -0,0 +1,141 @@
+import numpy as np
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# MessagePack extension type carrying a float64 array as raw little-endian bytes
+FLOAT64_EXT = 1
+# Response keys holding the row data, in the columnar shape, of paged and analysis responses
+TABLE_KEYS = ('results', 'records')
+
+class ArrayJSONEncoder(JSONEncoder):
+    """
+    DRF's encoder plus NumPy arrays with NaN sent as null, the same output
+    orjson gives them.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, np.ndarray) and obj.dtype.kind == 'f':
+            return np.where(np.isnan(obj), None, obj).tolist()
+        return super().default(obj)
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer that uses orjson when it is installed and falls back to
+    DRF's renderer otherwise.
+
+    orjson writes NumPy arrays without converting them to lists first,
+    which is what makes the columnar response shape cheap to send. NaN in
+    arrays is rendered as null either way.
+    """
+    encoder_class = ArrayJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # orjson only indents by two; the browsable API asks for four
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # OPT_UTC_Z writes UTC times as '...Z', as DRF's encoder does
+        return orjson.dumps(data, default=self.encoder_class().default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z)
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack bodies (Accept: application/msgpack). Float64 arrays are
+    sent as extension type FLOAT64_EXT holding their raw bytes, which a
+    client turns into a NumPy array without parsing numbers.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    # Views send rows in the columnar shape to binary renderers
+    columnar = True
+
+    def default(self, obj):
+        if isinstance(obj, np.ndarray) and obj.dtype.kind == 'f':
+            return msgpack.ExtType(FLOAT64_EXT, obj.astype('<f8', copy=False).tobytes())
+        if isinstance(obj, np.generic):
+            return obj.item()
+        return ArrayJSONEncoder().default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.default)
+
+class ArrowStreamRenderer(BaseRenderer):
+    """
+    Apache Arrow IPC stream bodies (Accept: application/vnd.apache.arrow.stream).
+
+    The row data of the response (TABLE_KEYS) becomes one record batch; the
+    remaining fields travel as JSON in the schema metadata under b'meta',
+    with b'table' naming the key the batch belongs to.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+    columnar = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rest, key, table = data, '', None
+        if isinstance(data, dict):
+            key = next((k for k in TABLE_KEYS if isinstance(data.get(k), dict)), '')
+            if key:
+                rest = {k: v for k, v in data.items() if k != key}
+                table = data[key]
+
+        if table is None:
+            batch = pa.record_batch([], schema=pa.schema([]))
+        else:
+            batch = pa.record_batch(
+                [pa.array(table['data'][column]) for column in table['columns']],
+                names=list(table['columns']),
+            )
+        schema = batch.schema.with_metadata({
+            'meta': FastJSONRenderer().render(rest),
+            'table': key,
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            writer.write_batch(batch.replace_schema_metadata(schema.metadata))
+        return sink.getvalue().to_pybytes()
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Accepts Accept: text/event-stream on the job events endpoint. The stream
+    itself is sent by the view; anything rendered here is an error response,
+    sent as a single "failed" event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b'event: failed\ndata: ' + FastJSONRenderer().render(data) + b'\n\n'
+
+# Offered, next to JSON, by the endpoints that return rows; only when their library is
+# installed. When a client accepts both, the first one listed here is used.
+BINARY_RENDERERS = [
+    renderer for renderer, module in ((ArrowStreamRenderer, pa), (MessagePackRenderer, msgpack))
+    if module is not None
+]
@@ -0,0 +1,81 @@
+import os
+import shutil
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+from .blobs import delete_datasets, release_blobs
+from .models import AnalysisJob, DatasetBlob, EquipmentDataset
+from .uploads import expire_stale_sessions
+
+def prune_history(user, limit=None):
+    """
+    Keeps only the user's `limit` (HISTORY_RETENTION_LIMIT) most recent
+    datasets. The stale rows are selected with one query on the
+    (user, uploaded_at) index; their blobs, files, column stores and
+    analyses go once nothing references them. Returns the number removed.
+    """
+    limit = settings.HISTORY_RETENTION_LIMIT if limit is None else limit
+    recent = EquipmentDataset.objects.filter(user=user).order_by('-uploaded_at').values('id')[:limit]
+    stale = EquipmentDataset.objects.filter(user=user).exclude(id__in=recent)
+    return delete_datasets(stale)
+
+def sweep(limit=None):
+    """
+    Periodic clean-up across all users: history beyond the retention limit,
+    finished jobs older than JOB_RETENTION_DAYS, idle chunked uploads and
+    blobs left unreferenced (e.g. by an interrupted request).
+    Returns the counts of what was removed.
+    """
+    limit = settings.HISTORY_RETENTION_LIMIT if limit is None else limit
+    over_limit = (EquipmentDataset.objects.values('user')
+                  .annotate(total=Count('id')).filter(total__gt=limit).values_list('user', flat=True))
+    datasets = sum(prune_history(user, limit) for user in over_limit)
+
+    cutoff = timezone.now() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    jobs, _ = AnalysisJob.objects.filter(
+        status__in=[AnalysisJob.STATUS_DONE, AnalysisJob.STATUS_FAILED],
+        updated_at__lt=cutoff,
+    ).delete()
+
+    uploads = expire_stale_sessions()
+    blobs = release_blobs(DatasetBlob.objects.filter(datasets__isnull=True).values_list('id', flat=True))
+
+    return {"datasets": datasets, "jobs": jobs, "uploads": uploads, "blobs": blobs}
+
+def remove_orphan_files(min_age_hours=24):
+    """
+    Deletes stored CSVs and column stores that no blob or history entry
+    refers to, such as the duplicate copies of identical uploads made before
+    deduplication. Entries with a blob are first pointed at the blob's file.
+    Only files untouched for `min_age_hours` go, so uploads still being
+    stored are left alone. Returns the counts of what was removed.
+    """
+    for dataset in EquipmentDataset.objects.filter(blob__isnull=False).select_related('blob'):
+        if dataset.file.name != dataset.blob.file.name:
+            dataset.file = dataset.blob.file.name
+            dataset.save(update_fields=['file'])
+
+    cutoff = time.time() - min_age_hours * 3600
+    removed = {"files": 0, "column_stores": 0}
+    kept = {
+        "files": set(DatasetBlob.objects.values_list('file', flat=True))
+        | set(EquipmentDataset.objects.values_list('file', flat=True)),
+        # A blob's store is found at its digest even before columns_dir is recorded
+        "column_stores": {os.path.join('columns', digest) for digest in DatasetBlob.objects.values_list('sha256', flat=True)}
+        | set(DatasetBlob.objects.exclude(columns_dir='').values_list('columns_dir', flat=True)),
+    }
+    for kind, folder in (("files", 'uploads'), ("column_stores", 'columns')):
+        path = os.path.join(settings.MEDIA_ROOT, folder)
+        if not os.path.isdir(path):
+            continue
+        for entry in os.scandir(path):
+            if os.path.join(folder, entry.name) in kept[kind] or entry.stat().st_mtime > cutoff:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+            removed[kind] += 1
+    return removed
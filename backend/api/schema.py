@@ -0,0 +1,114 @@
+import csv
+import io
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+
+# Keys used in "averages" and the CSV column each one is computed from
+PARAMETERS = {
+    'flowrate': 'Flowrate',
+    'pressure': 'Pressure',
+    'temperature': 'Temperature',
+}
+
+# Types the required columns are parsed as; other columns are never read
+DTYPES = {
+    'Equipment Name': 'str',
+    'Type': 'str',
+    **{column: 'float64' for column in PARAMETERS.values()},
+}
+
+# Bytes read from the start of a file to check its header and first rows
+SAMPLE_BYTES = 64 * 1024
+# Rough CSV bytes per row, to turn a chunk size in rows into a pyarrow block size
+ARROW_ROW_BYTES = 64
+
+def clean_columns(df):
+    """
+    Strips whitespace from the column names and checks the required ones exist.
+    """
+    df.columns = [c.strip() for c in df.columns]
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        return f"CSV missing required columns: {REQUIRED_COLUMNS}"
+    return None
+
+def validate_csv(f):
+    """
+    Checks the header and the first rows of a CSV (a binary file object)
+    before anything parses the whole file. Returns (columns, error), where
+    `columns` maps each required column to its spelling in the header.
+
+    Only SAMPLE_BYTES are read, so a file with missing columns or text in
+    a numeric column is rejected without reading the rest of it.
+    """
+    f.seek(0)
+    head = f.read(SAMPLE_BYTES)
+    f.seek(0)
+    if len(head) == SAMPLE_BYTES and b'\n' in head:
+        # Drop the row cut off at the end of the sample
+        head = head[:head.rfind(b'\n') + 1]
+    try:
+        text = head.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return None, "CSV must be UTF-8 encoded text"
+    if not text.strip():
+        return None, "CSV file is empty"
+
+    header = next(csv.reader(io.StringIO(text)), [])
+    spelled = {name.strip(): name for name in header}
+    missing = [column for column in REQUIRED_COLUMNS if column not in spelled]
+    if missing:
+        return None, f"CSV missing required columns: {missing}"
+    columns = {column: spelled[column] for column in REQUIRED_COLUMNS}
+
+    try:
+        sample = pd.read_csv(io.StringIO(text), usecols=list(columns.values()), dtype=str)
+    except (ValueError, pd.errors.ParserError) as e:
+        return None, f"CSV could not be parsed: {e}"
+    for column in PARAMETERS.values():
+        raw = sample[columns[column]]
+        bad = raw.notna() & pd.to_numeric(raw, errors='coerce').isna()
+        if bad.any():
+            row = int(bad.idxmax())
+            return None, f"Column '{column}' must be numeric (row {row + 1}: {raw[row]!r})"
+    return columns, None
+
+def read_csv_chunks(f, columns, chunk_rows, engine='c'):
+    """
+    Yields DataFrames of about `chunk_rows` rows holding only the required
+    columns, under their canonical names, parsed straight into DTYPES.
+
+    `engine` is 'c' (pandas) or 'pyarrow', which reads with pyarrow's
+    multithreaded streaming CSV reader and needs pyarrow installed; without
+    it the C engine is used.
+    """
+    canonical = {spelling: column for column, spelling in columns.items()}
+    try:
+        if engine == 'pyarrow' and pa is not None:
+            reader = pa_csv.open_csv(
+                f,
+                read_options=pa_csv.ReadOptions(block_size=max(chunk_rows * ARROW_ROW_BYTES, 1 << 20)),
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=list(columns.values()),
+                    # Empty and NA cells become null, as with pandas, not ''
+                    strings_can_be_null=True,
+                    column_types={columns[c]: pa.float64() if t == 'float64' else pa.string()
+                                  for c, t in DTYPES.items()},
+                ),
+            )
+            for batch in reader:
+                yield batch.to_pandas().rename(columns=canonical)
+        else:
+            with pd.read_csv(f, usecols=list(columns.values()),
+                             dtype={columns[c]: t for c, t in DTYPES.items()}, chunksize=chunk_rows) as reader:
+                for chunk in reader:
+                    yield chunk.rename(columns=canonical)
+    except ValueError as e:
+        # A bad value past the validated sample (pyarrow's ArrowInvalid is a ValueError too)
+        raise ValueError(f"CSV could not be parsed: {e}") from e
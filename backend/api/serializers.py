@@ -1,6 +1,8 @@
+import re
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import EquipmentDataset
+from .models import AnalysisJob, EquipmentDataset, UploadSession
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,5 +26,37 @@ class RegisterSerializer(serializers.ModelSerializer):
 class EquipmentDatasetSerializer(serializers.ModelSerializer):
     class Meta:
         model = EquipmentDataset
-        fields = ['id', 'file', 'uploaded_at']
-        read_only_fields = ['user']
\ No newline at end of file
+        fields = ['id', 'file', 'filename', 'uploaded_at']
+        read_only_fields = ['user', 'filename']
+        # The stored name can be another user's upload of the same bytes
+        extra_kwargs = {'file': {'write_only': True}}
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnalysisJob
+        fields = ['id', 'status', 'progress', 'partial', 'error', 'dataset', 'created_at', 'updated_at']
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'sha256', 'received', 'created_at', 'updated_at']
+        read_only_fields = ['received']
+
+    def validate_filename(self, value):
+        value = value.replace('\\', '/').rsplit('/', 1)[-1].strip()
+        if not value:
+            raise serializers.ValidationError("A file name is required.")
+        return value
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Size must be positive.")
+        if value > settings.CHUNKED_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(f"Uploads are limited to {settings.CHUNKED_UPLOAD_MAX_BYTES} bytes.")
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError("Expected a hex SHA-256 digest.")
+        return value
@@ -0,0 +1,257 @@
+import numpy as np
+from django.conf import settings
+from .schema import PARAMETERS
+
+# Bump when the layout of the "stats" object changes; clients can check it
+STATS_SCHEMA = 3
+# Percentiles reported per parameter, as output key -> quantile
+QUANTILES = {'p5': 0.05, 'p50': 0.5, 'p95': 0.95}
+HISTOGRAM_BINS = 20
+
+def number(value):
+    # JSON has no NaN; statistics of empty groups are sent as null
+    value = float(value)
+    return None if np.isnan(value) else value
+
+class ColumnMoments:
+    """
+    Counts, means, spreads, min and max of one parameter column per group
+    (Type code + 1; group 0 is a missing Type), updated one block of rows
+    at a time and merged with the parallel variance formula.
+    """
+
+    def __init__(self, groups):
+        self.groups = groups
+        self.rows = 0
+        self.count = np.zeros(groups, dtype=np.int64)
+        self.mean = np.zeros(groups)
+        # Sum of squared deviations from each group's mean
+        self.m2 = np.zeros(groups)
+        self.min = np.full(groups, np.inf)
+        self.max = np.full(groups, -np.inf)
+
+    def update(self, values, group_ids):
+        """
+        Adds a block of values with the group of each row.
+        """
+        self.rows += len(values)
+        present = ~np.isnan(values)
+        if not present.all():
+            values, group_ids = values[present], group_ids[present]
+        if not len(values):
+            return
+
+        n = np.bincount(group_ids, minlength=self.groups)
+        used = n > 0
+        block_mean = np.zeros(self.groups)
+        block_mean[used] = np.bincount(group_ids, weights=values, minlength=self.groups)[used] / n[used]
+        deviations = values - block_mean[group_ids]
+        deviations *= deviations
+        block_m2 = np.bincount(group_ids, weights=deviations, minlength=self.groups)
+        total = self.count + n
+        delta = block_mean[used] - self.mean[used]
+        self.mean[used] += delta * n[used] / total[used]
+        self.m2[used] += block_m2[used] + delta * delta * self.count[used] * n[used] / total[used]
+        self.count = total
+        np.minimum.at(self.min, group_ids, values)
+        np.maximum.at(self.max, group_ids, values)
+
+    def summary(self, group):
+        n = int(self.count[group])
+        if n == 0:
+            return {"count": 0, "min": None, "max": None, "mean": None, "std": None}
+        return {
+            "count": n,
+            "min": float(self.min[group]),
+            "max": float(self.max[group]),
+            "mean": number(self.mean[group]),
+            "std": number(np.sqrt(self.m2[group] / (n - 1))) if n > 1 else None,
+        }
+
+    def overall(self):
+        """
+        Statistics over every row, combined from the groups.
+        """
+        n = int(self.count.sum())
+        summary = {"count": n, "missing": int(self.rows - n)}
+        if n == 0:
+            return {**summary, "min": None, "max": None, "mean": None, "std": None}
+
+        used = self.count > 0
+        mean = (self.mean[used] * self.count[used]).sum() / n
+        # Parallel combination of the per-group spreads
+        m2 = (self.m2[used] + self.count[used] * (self.mean[used] - mean) ** 2).sum()
+        return {
+            **summary,
+            "min": float(self.min[used].min()),
+            "max": float(self.max[used].max()),
+            "mean": float(mean),
+            "std": float(np.sqrt(m2 / (n - 1))) if n > 1 else None,
+        }
+
+class BlockStatistics:
+    """
+    Counts and moments of the "stats" section, accumulated from blocks of
+    rows: a ColumnMoments per parameter and the row count of every Type.
+    """
+
+    def __init__(self, types):
+        self.types = types
+        self.moments = {key: ColumnMoments(len(types) + 1) for key in PARAMETERS}
+        self.type_rows = np.zeros(len(types) + 1, dtype=np.int64)
+
+    def update(self, values, codes):
+        """
+        Adds a block: `values` maps each PARAMETERS key to a float array,
+        `codes` holds the Type codes of its rows (-1 for a missing Type).
+        """
+        # Code -1 (missing Type) is shifted to group 0, so codes index groups directly
+        group_ids = codes.astype(np.int64) + 1
+        self.type_rows += np.bincount(group_ids, minlength=len(self.types) + 1)
+        for key, array in values.items():
+            self.moments[key].update(array, group_ids)
+
+    def result(self):
+        by_type = {t: {"count": int(rows)} for t, rows in zip(self.types, self.type_rows[1:])}
+        parameters = {}
+        for key, moments in self.moments.items():
+            parameters[key] = moments.overall()
+            for index, type_name in enumerate(self.types):
+                by_type[type_name][key] = moments.summary(index + 1)
+        return {"schema": STATS_SCHEMA, "parameters": parameters, "by_type": by_type}
+
+def block_moments(store, start=0, block_rows=None):
+    """
+    BlockStatistics.result() for rows start.. of a column store, read one
+    block at a time.
+    """
+    block_rows = block_rows or settings.ANALYSIS_CHUNK_ROWS
+    statistics = BlockStatistics(store.types)
+    columns = {key: store.values(column) for key, column in PARAMETERS.items()}
+    codes = store.type_codes()
+    for begin in range(start, store.rows, block_rows):
+        stop = min(begin + block_rows, store.rows)
+        statistics.update({key: np.asarray(values[begin:stop]) for key, values in columns.items()},
+                          np.asarray(codes[begin:stop]))
+    return statistics.result()
+
+def percentiles(values):
+    """
+    QUANTILES of NaN-free values (numpy's default, linear method). The
+    array is partitioned in place.
+    """
+    if not len(values):
+        return {key: None for key in QUANTILES}
+    found = np.percentile(values, [q * 100 for q in QUANTILES.values()], overwrite_input=True)
+    return {key: float(value) for key, value in zip(QUANTILES, found)}
+
+def distribution(store):
+    """
+    Exact QUANTILES per parameter and per Type, and a HISTOGRAM_BINS
+    histogram per parameter, over every row of a column store.
+
+    The rows are grouped by Type once, with a stable (radix) argsort. Each
+    parameter column is then copied in that order and every Type's run
+    partitioned in place, so memory peaks at about three copies of one
+    column, however many Types there are.
+    Returns ({key: summary}, {type: {key: summary}}).
+    """
+    group_ids = np.asarray(store.type_codes()).astype(np.int64) + 1
+    order = np.argsort(group_ids, kind='stable')
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(group_ids, minlength=len(store.types) + 1))))
+    del group_ids
+
+    parameters, by_type = {}, {type_name: {} for type_name in store.types}
+    for key, column in PARAMETERS.items():
+        grouped = np.asarray(store.values(column))[order]
+        for index, type_name in enumerate(store.types):
+            run = grouped[bounds[index + 1]:bounds[index + 2]]
+            by_type[type_name][key] = percentiles(run[~np.isnan(run)])
+
+        present = grouped[~np.isnan(grouped)]
+        del grouped
+        histogram = None
+        if len(present):
+            low, high = present.min(), present.max()
+            if np.isfinite(low) and np.isfinite(high):
+                counts, edges = np.histogram(present, bins=HISTOGRAM_BINS, range=(low, high))
+                histogram = {"edges": edges.tolist(), "counts": counts.tolist()}
+        parameters[key] = {**percentiles(present), "histogram": histogram}
+    return parameters, by_type
+
+def with_distribution(stats, store):
+    """
+    Counts and moments (a BlockStatistics result) completed with the
+    percentiles and histograms of every row of the store.
+    """
+    parameters, by_type = distribution(store)
+    return {
+        **stats,
+        "parameters": {key: {**summary, **parameters[key]} for key, summary in stats["parameters"].items()},
+        "by_type": {
+            type_name: {key: {**value, **by_type[type_name][key]} if key in PARAMETERS else value
+                        for key, value in summary.items()}
+            for type_name, summary in stats["by_type"].items()
+        },
+    }
+
+def compute_statistics(store):
+    """
+    The "stats" section of a column store: per parameter the count,
+    missing, min, max, mean, std (sample), QUANTILES and a histogram, and
+    the same (without histograms) for every Type.
+    """
+    return with_distribution(block_moments(store), store)
+
+def combine(old, new):
+    """
+    Count, mean, std (sample), min and max of two summaries of disjoint rows,
+    merged with the parallel variance formula.
+    """
+    n_a, n_b = old["count"], new["count"]
+    if n_b == 0:
+        return {}
+    if n_a == 0:
+        return {key: new[key] for key in ("count", "mean", "std", "min", "max")}
+    n = n_a + n_b
+    m2_a = old["std"] ** 2 * (n_a - 1) if n_a > 1 else 0.0
+    m2_b = new["std"] ** 2 * (n_b - 1) if n_b > 1 else 0.0
+    diff = new["mean"] - old["mean"]
+    m2 = m2_a + m2_b + diff * diff * n_a * n_b / n
+    return {
+        "count": n,
+        "mean": old["mean"] + diff * n_b / n,
+        "std": float(np.sqrt(m2 / (n - 1))),
+        "min": min(old["min"], new["min"]),
+        "max": max(old["max"], new["max"]),
+    }
+
+def extend_statistics(stats, store, start):
+    """
+    Updates the "stats" of rows 0..start for the rows start..store.rows.
+    Counts, means, stds, min and max (overall and per Type) are merged
+    exactly from the new rows alone. Percentiles and histograms cannot be
+    merged, so they are recomputed from the columns (O(rows), no parsing).
+    """
+    added = block_moments(store, start)
+    by_type = {t: dict(summary) for t, summary in stats["by_type"].items()}
+    for type_name, summary in added["by_type"].items():
+        by_type.setdefault(type_name, {"count": 0})
+        by_type[type_name]["count"] += summary["count"]
+
+    parameters = {}
+    for key in PARAMETERS:
+        overall = added["parameters"][key]
+        parameters[key] = {
+            **stats["parameters"][key],
+            **combine(stats["parameters"][key], overall),
+            "missing": stats["parameters"][key]["missing"] + overall["missing"],
+        }
+        for type_name, summary in added["by_type"].items():
+            if key not in by_type[type_name]:
+                # A Type first seen in the new rows: all of its rows are new, so exact
+                by_type[type_name][key] = summary[key]
+            else:
+                by_type[type_name][key] = {**by_type[type_name][key], **combine(by_type[type_name][key], summary[key])}
+
+    return with_distribution({**stats, "parameters": parameters, "by_type": by_type}, store)
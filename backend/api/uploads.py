@@ -0,0 +1,107 @@
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .blobs import adopt_file, file_sha256
+from .models import EquipmentDataset, UploadSession
+from .schema import validate_csv
+
+READ_BLOCK = 1024 * 1024
+
+def part_path(session):
+    return os.path.join(settings.MEDIA_ROOT, 'chunked', f'{session.id}.part')
+
+def delete_session(session):
+    """
+    Removes an upload session together with its partial file.
+    """
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+def expire_stale_sessions(user=None):
+    """
+    Drops uploads (of one user, or everyone's) that have not received a
+    chunk for CHUNKED_UPLOAD_EXPIRY_HOURS. Returns how many were dropped.
+    """
+    cutoff = timezone.now() - timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+    stale = UploadSession.objects.filter(updated_at__lt=cutoff)
+    if user is not None:
+        stale = stale.filter(user=user)
+    count = 0
+    for session in stale:
+        delete_session(session)
+        count += 1
+    return count
+
+def write_chunk(session, offset, stream):
+    """
+    Writes the bytes of `stream` into the partial file at `offset`, which
+    must equal the bytes received so far. Returns (received, error); an
+    interrupted chunk returns both, the error and the offset to resume from.
+
+    Whatever part of the chunk arrived is kept, so an interrupted request
+    only costs the bytes that never made it to disk.
+    """
+    path = part_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    error = None
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+        f.seek(offset)
+        # Drop bytes past the offset left by an earlier, interrupted chunk
+        f.truncate()
+        while stream is not None:
+            try:
+                block = stream.read(READ_BLOCK)
+            except OSError:
+                # UnreadablePostError or a reset connection: the client went away mid-chunk
+                error = "Chunk interrupted"
+                break
+            if not block:
+                break
+            if offset + written + len(block) > session.size:
+                f.truncate(offset)
+                return None, f"Chunk runs past the declared size of {session.size} bytes"
+            f.write(block)
+            written += len(block)
+
+    received = offset + written
+    # Conditional on the old offset, so a concurrent chunk cannot move it backwards
+    UploadSession.objects.filter(pk=session.pk, received=offset).update(
+        received=received, updated_at=timezone.now())
+    if error:
+        return received, f"{error} after {written} bytes; resume at offset {received}"
+    return received, None
+
+def finalize_upload(session):
+    """
+    Verifies the assembled file against the declared size and SHA-256,
+    checks its CSV header and first rows, and records it as a new
+    EquipmentDataset, sharing the stored blob when the same bytes were
+    uploaded before. Returns (dataset, error).
+    """
+    if session.received != session.size:
+        return None, f"Upload incomplete: {session.received} of {session.size} bytes received"
+
+    path = part_path(session)
+    if file_sha256(path) != session.sha256:
+        # No way to tell which chunk is corrupt; the upload has to start over
+        delete_session(session)
+        return None, "Checksum mismatch: the assembled file does not match the declared sha256"
+
+    with open(path, 'rb') as f:
+        _, error = validate_csv(f)
+    if error:
+        delete_session(session)
+        return None, error
+
+    with transaction.atomic():
+        blob = adopt_file(path, session.filename, session.sha256)
+        dataset = EquipmentDataset.objects.create(
+            user=session.user, blob=blob, file=blob.file.name, filename=session.filename)
+    session.delete()
+    return dataset, None
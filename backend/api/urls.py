@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import UploadAndAnalyzeView, HistoryView, RegisterView, CustomLoginView, RetrieveAnalysisView
+from .views import UploadAndAnalyzeView, BatchUploadView, CompareView, DatasetAppendView, HistoryView, RegisterView, CustomLoginView, RetrieveAnalysisView, DatasetRecordsView, DatasetQueryView, DatasetDownloadView, JobStatusView, JobEventsView, ChunkedUploadStartView, ChunkedUploadView, ChunkedUploadFinalizeView, AnalysisCacheStatsView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
@@ -7,8 +7,26 @@ urlpatterns = [
     
     # Endpoint for uploading and getting analysis
     path('upload/', UploadAndAnalyzeView.as_view(), name='upload_analyze'),
+    path('upload/batch/', BatchUploadView.as_view(), name='upload_batch'),
+
+    # Resumable upload: start, PUT chunks, then finalize to analyze
+    path('uploads/', ChunkedUploadStartView.as_view(), name='chunked_upload_start'),
+    path('uploads/<uuid:upload_id>/', ChunkedUploadView.as_view(), name='chunked_upload'),
+    path('uploads/<uuid:upload_id>/finalize/', ChunkedUploadFinalizeView.as_view(), name='chunked_upload_finalize'),
     
     # Endpoint for fetching history
     path('history/', HistoryView.as_view(), name='history'),
+    path('history/compare/', CompareView.as_view(), name='history_compare'),
     path('history/<int:pk>/', RetrieveAnalysisView.as_view(), name='history_detail'),
+    path('history/<int:pk>/append/', DatasetAppendView.as_view(), name='history_append'),
+    path('history/<int:pk>/records/', DatasetRecordsView.as_view(), name='history_records'),
+    path('history/<int:pk>/query/', DatasetQueryView.as_view(), name='history_query'),
+    path('history/<int:pk>/download/', DatasetDownloadView.as_view(), name='history_download'),
+
+    # Background analysis jobs (upload/?async=true): status, and a stream of progress events
+    path('jobs/<uuid:job_id>/', JobStatusView.as_view(), name='job_status'),
+    path('jobs/<uuid:job_id>/events/', JobEventsView.as_view(), name='job_events'),
+
+    # Operators (staff users only)
+    path('cache/stats/', AnalysisCacheStatsView.as_view(), name='analysis_cache_stats'),
 ]
\ No newline at end of file
@@ -1,12 +1,38 @@
-import pandas as pd
+import hashlib
+import os
+from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
-from .models import EquipmentDataset
-from .serializers import EquipmentDatasetSerializer, RegisterSerializer, UserSerializer
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+from .models import AnalysisJob, DatasetAnalysis, EquipmentDataset, UploadSession
+from .serializers import AnalysisJobSerializer, EquipmentDatasetSerializer, RegisterSerializer, UploadSessionSerializer, UserSerializer
+from .analysis import ANALYSIS_VERSION, build_response, get_analysis, load_records
+from .append import append_rows
+from .batch import analyze_batch, batch_members, merge_summaries, store_member
+from .blobs import HashingUploadHandler, delete_datasets, store_blob
+from .cache import cache_stats
+from .compare import compare, load_aggregates, parse_dataset_ids
+from .events import job_events
+from .jobs import submit_analysis
+from .middleware import cache_compressed
+from .pagination import RecordsPagination
+from .renderers import BINARY_RENDERERS, EventStreamRenderer
+from .retention import prune_history
+from .query import parse_filters, query_dataset
+from .schema import REQUIRED_COLUMNS, validate_csv
+from .uploads import delete_session, expire_stale_sessions, finalize_upload, write_chunk
 
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -35,94 +61,513 @@ class CustomLoginView(ObtainAuthToken):
             'user': UserSerializer(user).data
         })
 
-def analyze_dataset(dataset):
+# Endpoints returning rows also speak MessagePack and Arrow when the client
+# asks for them (Accept header); JSON stays the default
+DATA_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, *BINARY_RENDERERS]
+
+def parse_shape(request):
     """
-    Helper function to process the CSV and return statistics.
+    Reads ?shape=: 'rows' (the default, one dict per row) or 'columnar'
+    ({"columns": [...], "data": {column: [...]}}). Binary formats always
+    get the columnar shape. Returns (shape, error).
     """
-    try:
-        # Read the CSV file path
-        df = pd.read_csv(dataset.file.path)
-        
-        # Clean column names (strip whitespace)
-        df.columns = [c.strip() for c in df.columns]
-        
-        # Check if required columns exist (Basic validation)
-        required_columns = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-        if not all(col in df.columns for col in required_columns):
-             return None, f"CSV missing required columns: {required_columns}"
-
-        # Calculate Summary Statistics
-        stats = {
-            "file_id": dataset.id,
-            "uploaded_at": dataset.uploaded_at,
-            "total_count": len(df),
-            "averages": {
-                "flowrate": round(df['Flowrate'].mean(), 2),
-                "pressure": round(df['Pressure'].mean(), 2),
-                "temperature": round(df['Temperature'].mean(), 2),
-            },
-            "type_distribution": df['Type'].value_counts().to_dict(),
-            "preview": df.head(10).to_dict(orient='records'),
-            "records": df[['Equipment Name','Type','Flowrate','Pressure','Temperature']].to_dict(orient='records')
-        }
-        return stats, None
-    except Exception as e:
-        return None, str(e)
+    shape = request.query_params.get('shape', '').strip().lower() or 'rows'
+    if shape not in ('rows', 'columnar'):
+        return None, f"Unknown shape '{shape}'. Allowed: ['rows', 'columnar']"
+    if getattr(request.accepted_renderer, 'columnar', False):
+        shape = 'columnar'
+    return shape, None
+
+def analysis_response(request, dataset, shape='rows'):
+    """
+    Analyzes a newly stored dataset: 202 with a job id for ?async=true,
+    otherwise 201 with the analysis (the dataset is removed if it fails).
+    """
+    # Background mode (?async=true): return a job id and analyze on a worker thread
+    if str(request.query_params.get('async', '')).lower() in ('1', 'true'):
+        job = submit_analysis(dataset, request.user)
+        return Response({
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": reverse('job_status', args=[job.id], request=request),
+            "events_url": reverse('job_events', args=[job.id], request=request),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    # Process the CSV using Pandas and store the result for later reads
+    stats, error = get_analysis(dataset, shape=shape)
+
+    if error:
+        delete_datasets(EquipmentDataset.objects.filter(pk=dataset.pk))
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = Response(stats, status=status.HTTP_201_CREATED)
+    # The same body history/<id>/ sends: its compressed form is cached for that first read
+    response['ETag'] = quote_etag(analysis_etag(request, dataset.pk))
+    response.cache_compressed = True
+    return response
 
 class UploadAndAnalyzeView(APIView):
     # Allow file uploads via multipart/form-data
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = DATA_RENDERERS
 
     def post(self, request, *args, **kwargs):
+        shape, error = parse_shape(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Hash the file as it streams in; must be installed before request.data is read
+        hasher = HashingUploadHandler(request)
+        request.upload_handlers.insert(0, hasher)
         file_serializer = EquipmentDatasetSerializer(data=request.data)
         
         if file_serializer.is_valid():
-            # 1. Save the file to the database (History Management), linked to user
-            dataset = file_serializer.save(user=request.user)
-            
-            # 2. Maintain only last 10 entries for THIS user
-            # Get all IDs ordered by upload time (descending)
-            ids = list(EquipmentDataset.objects.filter(user=request.user).values_list('id', flat=True).order_by('-uploaded_at'))
-            if len(ids) > 10:
-                # Delete older records
-                EquipmentDataset.objects.filter(user=request.user).exclude(id__in=ids[:10]).delete()
-
-            # 3. Process the CSV using Pandas
-            stats, error = analyze_dataset(dataset)
-            
+            # 1. Reject a file with a bad header or sample rows before storing anything
+            upload = file_serializer.validated_data['file']
+            _, error = validate_csv(upload)
             if error:
-                dataset.delete()
                 return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+            # 2. Store the bytes once per distinct content, and add a history entry linked to user
+            with transaction.atomic():
+                blob = store_blob(upload, hasher.digests['file'])
+                dataset = EquipmentDataset.objects.create(
+                    user=request.user, blob=blob, file=blob.file.name, filename=upload.name)
             
-            return Response(stats, status=status.HTTP_201_CREATED)
+            # 3. Maintain only the last HISTORY_RETENTION_LIMIT entries for THIS user
+            prune_history(request.user)
+
+            # 4. Analyze now, or in the background with ?async=true
+            return analysis_response(request, dataset, shape)
         
         else:
             return Response(file_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class BatchUploadView(APIView):
+    """
+    Uploads several CSVs at once, as repeated `files` fields and/or zip
+    archives of CSVs, and analyzes them in parallel (BATCH_WORKERS
+    processes). Returns each file's outcome plus a summary over all of them.
+    """
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        members, error = batch_members(request.FILES.getlist('files'))
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 1. Validate and store every file; a bad one does not stop the rest
+        entries = []
+        for filename, open_member in members:
+            with open_member() as source:
+                dataset, error = store_member(request.user, filename, source)
+            entries.append((filename, dataset, error))
+
+        # 2. Analyze the stored files on the process pool
+        outcomes = analyze_batch([dataset for _, dataset, _ in entries if dataset is not None])
+
+        files = []
+        results = []
+        failed = []
+        for filename, dataset, error in entries:
+            if dataset is not None:
+                stats, error = outcomes[dataset.pk]
+            if error:
+                if dataset is not None:
+                    failed.append(dataset.pk)
+                files.append({"filename": filename, "error": error})
+                continue
+            results.append(stats)
+            files.append({
+                "filename": filename,
+                "file_id": dataset.pk,
+                "total_count": stats["total_count"],
+                "averages": stats["averages"],
+                "type_distribution": stats["type_distribution"],
+            })
+        delete_datasets(EquipmentDataset.objects.filter(pk__in=failed))
+
+        # 3. Retention applies to the batch too: only the newest entries stay in history
+        prune_history(request.user)
+        kept = set(EquipmentDataset.objects.filter(user=request.user).values_list('pk', flat=True))
+        for entry in files:
+            if "file_id" in entry and entry["file_id"] not in kept:
+                entry["file_id"] = None
+
+        if not results:
+            return Response({"error": "No file in the batch could be analyzed", "files": files},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"files": files, "summary": merge_summaries(results)},
+                        status=status.HTTP_201_CREATED)
+
+def upload_status(request, session):
+    return {
+        **UploadSessionSerializer(session).data,
+        "chunk_size": settings.CHUNKED_UPLOAD_CHUNK_BYTES,
+        "upload_url": reverse('chunked_upload', args=[session.id], request=request),
+    }
+
+class ChunkedUploadStartView(APIView):
+    """
+    Starts a resumable upload. Body: filename, size (bytes), sha256 (hex digest
+    of the whole file). Chunks are then PUT to the returned upload_url.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        expire_stale_sessions(request.user)
+        serializer = UploadSessionSerializer(data=request.data)
+        if serializer.is_valid():
+            session = serializer.save(user=request.user)
+            return Response(upload_status(request, session), status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class ChunkedUploadView(APIView):
+    """
+    GET reports how many bytes are stored (the offset to resume from).
+    PUT ?offset=N stores the raw request body as the chunk starting at byte N.
+    DELETE abandons the upload.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_session(self, request, upload_id):
+        return UploadSession.objects.filter(pk=upload_id, user=request.user).first()
+
+    def get(self, request, upload_id):
+        session = self.get_session(request, upload_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(upload_status(request, session))
+
+    def put(self, request, upload_id):
+        session = self.get_session(request, upload_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            offset = int(request.query_params.get('offset', ''))
+        except ValueError:
+            return Response({"error": "'offset' must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if offset != session.received:
+            return Response({
+                "error": f"Expected a chunk at offset {session.received}",
+                "received": session.received,
+            }, status=status.HTTP_409_CONFLICT)
+
+        received, error = write_chunk(session, offset, request.stream)
+        if error:
+            body = {"error": error}
+            if received is not None:
+                # Interrupted: tell the client where the stored bytes end
+                body["received"] = received
+            return Response(body, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"received": received, "size": session.size})
+
+    def delete(self, request, upload_id):
+        session = self.get_session(request, upload_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        delete_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class ChunkedUploadFinalizeView(APIView):
+    """
+    Verifies a completely uploaded file and analyzes it like POST /upload/,
+    including ?async=true.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = DATA_RENDERERS
+
+    def post(self, request, upload_id):
+        shape, error = parse_shape(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        session = UploadSession.objects.filter(pk=upload_id, user=request.user).first()
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        dataset, error = finalize_upload(session)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        prune_history(request.user)
+        return analysis_response(request, dataset, shape)
+
+# Clients may keep responses but must revalidate them (If-None-Match) before reuse;
+# they differ per user and format, hence private and Vary: Authorization, Accept
+REVALIDATE = [
+    vary_on_headers('Authorization', 'Accept'),
+    cache_control(private=True, no_cache=True),
+]
+
+def history_etag(request):
+    # Everything the history list shows of an entry besides its upload time
+    entries = EquipmentDataset.objects.filter(user=request.user).order_by('-uploaded_at').values_list(
+        'id', 'filename')[:settings.HISTORY_RETENTION_LIMIT]
+    return hashlib.sha256(','.join(f'{pk}:{name}' for pk, name in entries).encode()).hexdigest()[:32]
+
+def analysis_etag(request, pk):
+    """
+    Dataset id, content revision and ANALYSIS_VERSION fully determine the
+    analysis response, so a match is answered without touching the CSV.
+    """
+    dataset = EquipmentDataset.objects.filter(pk=pk, user=request.user).select_related('blob').first()
+    if dataset is None or dataset.blob is None:
+        return None
+    shape, _ = parse_shape(request)
+    return f"{dataset.id}-{dataset.blob.revision[:32]}-v{ANALYSIS_VERSION}-{shape}-{request.accepted_renderer.format}"
+
+def analysis_last_modified(request, pk):
+    # Only a result of the current version is what the view would send
+    return DatasetAnalysis.objects.filter(
+        blob__datasets__pk=pk, blob__datasets__user=request.user, version=ANALYSIS_VERSION,
+    ).values_list('computed_at', flat=True).first()
+
 class HistoryView(APIView):
     """
-    Returns the list of the last 10 uploaded datasets for the authenticated user.
+    Returns the list of the last 10 (HISTORY_RETENTION_LIMIT) uploaded datasets for the authenticated user.
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(REVALIDATE + [condition(etag_func=history_etag)])
     def get(self, request):
-        datasets = EquipmentDataset.objects.filter(user=request.user).order_by('-uploaded_at')[:10]
+        datasets = EquipmentDataset.objects.filter(user=request.user).order_by('-uploaded_at')[:settings.HISTORY_RETENTION_LIMIT]
         serializer = EquipmentDatasetSerializer(datasets, many=True)
         return Response(serializer.data)
 
 class RetrieveAnalysisView(APIView):
     """
-    Returns the analysis for a specific history item.
+    Returns the analysis for a specific history item. Sends an ETag and
+    Last-Modified; a matching conditional GET gets 304.
     """
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = DATA_RENDERERS
 
+    @method_decorator(REVALIDATE + [
+        condition(etag_func=analysis_etag, last_modified_func=analysis_last_modified),
+        cache_compressed,
+    ])
     def get(self, request, pk):
+        shape, error = parse_shape(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
         try:
             dataset = EquipmentDataset.objects.get(pk=pk, user=request.user)
-            stats, error = analyze_dataset(dataset)
+            # Served from the stored analysis; the CSV is only re-read after a version bump
+            stats, error = get_analysis(dataset, shape=shape)
             if error:
                 return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
             return Response(stats)
         except EquipmentDataset.DoesNotExist:
             return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+
+class CompareView(APIView):
+    """
+    Compares datasets of the user's history (?ids=1,2,3, or all of it):
+    a time series of averages by upload time plus per-parameter and
+    per-Type deltas, read from the stored analyses without touching the CSVs.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        ids, error = parse_dataset_ids(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        rows, error = load_aggregates(request.user, ids)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        missing = sorted(set(ids or []) - {row['id'] for row in rows})
+        if missing:
+            return Response({"error": f"Datasets not found: {missing}"}, status=status.HTTP_404_NOT_FOUND)
+        if len(rows) < 2:
+            return Response({"error": "Select at least two datasets to compare"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(compare(rows))
+
+class DatasetAppendView(APIView):
+    """
+    Appends the rows of a CSV (multipart `file`, same required columns) to
+    a history item. Its stored columns and analysis are extended from the
+    new rows only; returns the updated analysis.
+    """
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = DATA_RENDERERS
+
+    def post(self, request, pk):
+        shape, error = parse_shape(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            dataset = EquipmentDataset.objects.get(pk=pk, user=request.user)
+        except EquipmentDataset.DoesNotExist:
+            return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+        result, error = append_rows(dataset, upload)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response(build_response(dataset, result, shape))
+        # Same body as the next history/<id>/ read
+        response['ETag'] = quote_etag(analysis_etag(request, dataset.pk))
+        return response
+
+def parse_records_params(request):
+    """
+    Reads the ?columns=, ?ordering= and ?shape= options of the records endpoint.
+    Returns (columns, ordering, shape, error).
+    """
+    params = request.query_params
+    columns = [c.strip() for c in params.get('columns', '').split(',') if c.strip()]
+    unknown = [c for c in columns if c not in REQUIRED_COLUMNS]
+    if unknown:
+        return None, None, None, f"Unknown columns: {unknown}. Allowed: {REQUIRED_COLUMNS}"
+
+    ordering = params.get('ordering', '').strip() or None
+    if ordering and ordering.lstrip('-') not in REQUIRED_COLUMNS:
+        return None, None, None, f"Cannot order by '{ordering}'. Allowed: {REQUIRED_COLUMNS}"
+
+    shape, error = parse_shape(request)
+    return columns or None, ordering, shape, error
+
+def paginate_records(request, records, shape, view):
+    paginator = RecordsPagination()
+    if shape == 'columnar':
+        page = paginator.paginate_columns(records, request, view=view)
+    else:
+        page = paginator.paginate_queryset(records, request, view=view)
+    return paginator.get_paginated_response(page)
+
+class DatasetRecordsView(APIView):
+    """
+    Returns the rows of a history item one page at a time.
+    Supports ?offset=&limit=, ?columns=Name,Type, ?ordering=-Flowrate and
+    ?shape=columnar.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = DATA_RENDERERS
+
+    def get(self, request, pk):
+        try:
+            dataset = EquipmentDataset.objects.get(pk=pk, user=request.user)
+        except EquipmentDataset.DoesNotExist:
+            return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        columns, ordering, shape, error = parse_records_params(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            records = load_records(dataset, columns, ordering)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return paginate_records(request, records, shape, self)
+
+class JobStatusView(APIView):
+    """
+    Reports the progress of a background analysis job, and its result once done.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = DATA_RENDERERS
+
+    def get(self, request, job_id):
+        try:
+            job = AnalysisJob.objects.select_related('dataset').get(pk=job_id, user=request.user)
+        except AnalysisJob.DoesNotExist:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        data = AnalysisJobSerializer(job).data
+        if job.status == AnalysisJob.STATUS_DONE and job.dataset is not None:
+            shape, _ = parse_shape(request)
+            data['result'], _ = get_analysis(job.dataset, shape=shape or 'rows')
+        return Response(data)
+
+class JobEventsView(APIView):
+    """
+    Streams the progress of a background analysis job as Server-Sent Events
+    (text/event-stream): "progress" events with the rows parsed so far and
+    their aggregates, then "done" with the result (?shape= applies) or
+    "failed". Replaces polling the job status endpoint.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
+
+    def get(self, request, job_id):
+        shape, error = parse_shape(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            job = AnalysisJob.objects.select_related('dataset').get(pk=job_id, user=request.user)
+        except AnalysisJob.DoesNotExist:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(job_events(job, shape), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Tells nginx-style proxies to pass each event on instead of buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class DatasetQueryView(APIView):
+    """
+    Filters the rows of a history item on the server and returns the matching
+    page plus summary statistics of every match.
+    Filters: ?name=, ?type=, ?flowrate_min=, ?flowrate_max=, ?pressure_min=,
+    ?pressure_max=, ?temperature_min=, ?temperature_max=. Paging, ?columns=,
+    ?ordering= and ?shape= work as on the records endpoint.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = DATA_RENDERERS
+
+    def get(self, request, pk):
+        try:
+            dataset = EquipmentDataset.objects.get(pk=pk, user=request.user)
+        except EquipmentDataset.DoesNotExist:
+            return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        columns, ordering, shape, error = parse_records_params(request)
+        if not error:
+            filters, error = parse_filters(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            records, summary = query_dataset(dataset, filters, columns, ordering)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = paginate_records(request, records, shape, self)
+        response.data['summary'] = summary
+        return response
+
+class DatasetDownloadView(APIView):
+    """
+    Returns the originally uploaded CSV of a history item.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            dataset = EquipmentDataset.objects.select_related('blob').get(pk=pk, user=request.user)
+            stored = dataset.blob.file if dataset.blob_id else dataset.file
+            return FileResponse(stored.open('rb'), as_attachment=True,
+                                filename=dataset.filename or os.path.basename(dataset.file.name))
+        except EquipmentDataset.DoesNotExist:
+            return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+        except FileNotFoundError:
+            return Response({"error": "File no longer available"}, status=status.HTTP_404_NOT_FOUND)
+
+class AnalysisCacheStatsView(APIView):
+    """
+    Hit/miss counters and size of the analysis cache, for operators.
+    With the locmem backend they cover the worker that answers the request.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
@@ -1,6 +1,7 @@
 from pathlib import Path
 import os
 import dj_database_url
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -37,8 +38,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', # Must be at the top for CORS
+    'api.middleware.GzipRequestMiddleware', # Before anything reads the request body
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'api.middleware.CompressionMiddleware', # Static files are compressed by WhiteNoise
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -100,6 +103,94 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# CSV Analysis
+# Uploads are converted to a column store (media/columns/) in chunks of this many rows
+ANALYSIS_CHUNK_ROWS = int(os.environ.get('ANALYSIS_CHUNK_ROWS', 100000))
+# CSV parser for that conversion: 'c' (pandas) or 'pyarrow' (multithreaded,
+# needs pyarrow installed; falls back to 'c' without it)
+CSV_ENGINE = os.environ.get('CSV_ENGINE', 'c')
+# Worker threads per server process for background analysis (upload/?async=true)
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 2))
+# Progress streams of those jobs (jobs/<id>/events/): how often the server
+# checks the job, the interval of keep-alive comments, and the longest a
+# stream stays open before the client has to reconnect
+JOB_EVENTS_POLL_SECONDS = float(os.environ.get('JOB_EVENTS_POLL_SECONDS', 0.25))
+JOB_EVENTS_HEARTBEAT_SECONDS = int(os.environ.get('JOB_EVENTS_HEARTBEAT_SECONDS', 15))
+JOB_EVENTS_TIMEOUT_SECONDS = int(os.environ.get('JOB_EVENTS_TIMEOUT_SECONDS', 600))
+# Batch uploads (upload/batch/): processes analyzing the files of a batch in
+# parallel, and the most CSV files and bytes (after unzipping) one batch may hold
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', os.cpu_count() or 2))
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 100))
+BATCH_MAX_BYTES = int(os.environ.get('BATCH_MAX_BYTES', 4 * 1024 ** 3))
+# Largest body accepted after inflating a Content-Encoding: gzip request (default 2 GB)
+GZIP_UPLOAD_MAX_BYTES = int(os.environ.get('GZIP_UPLOAD_MAX_BYTES', 2 * 1024 ** 3))
+# Resumable uploads (uploads/): largest file, suggested chunk size, and how long
+# an upload may sit without receiving a chunk before it is discarded
+CHUNKED_UPLOAD_MAX_BYTES = int(os.environ.get('CHUNKED_UPLOAD_MAX_BYTES', 4 * 1024 ** 3))
+CHUNKED_UPLOAD_CHUNK_BYTES = int(os.environ.get('CHUNKED_UPLOAD_CHUNK_BYTES', 8 * 1024 ** 2))
+CHUNKED_UPLOAD_EXPIRY_HOURS = int(os.environ.get('CHUNKED_UPLOAD_EXPIRY_HOURS', 24))
+
+# History retention: entries kept per user (older ones are pruned on upload and
+# by `manage.py prune_history`), and days finished analysis jobs are kept
+HISTORY_RETENTION_LIMIT = int(os.environ.get('HISTORY_RETENTION_LIMIT', 10))
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', 7))
+
+# Analysis cache, in front of the stored analyses and the column stores.
+# 'locmem' keeps results in each server process; 'file' shares them between
+# all workers on the host (ANALYSIS_CACHE_DIR), so only one of them computes
+# a given result. Least recently used entries are evicted past the byte budget.
+ANALYSIS_CACHE = os.environ.get('ANALYSIS_CACHE', 'locmem')
+ANALYSIS_CACHE_DIR = os.environ.get('ANALYSIS_CACHE_DIR', os.path.join(BASE_DIR, 'analysis_cache'))
+ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get('ANALYSIS_CACHE_MAX_BYTES', 64 * 1024 ** 2))
+# Seconds an entry is kept (0 or less: until evicted), and how long a worker
+# waits for another worker computing the same result before computing it itself
+ANALYSIS_CACHE_TIMEOUT = max(int(os.environ.get('ANALYSIS_CACHE_TIMEOUT', 0)), 0) or None
+ANALYSIS_CACHE_LOCK_SECONDS = int(os.environ.get('ANALYSIS_CACHE_LOCK_SECONDS', 60))
+
+# API response compression: brotli when installed and accepted, gzip otherwise.
+# Bodies under COMPRESSION_MIN_BYTES are sent as they are. Compressed analysis
+# responses are kept per process up to COMPRESSION_CACHE_MAX_BYTES (0 disables).
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+COMPRESSION_CACHE_MAX_BYTES = int(os.environ.get('COMPRESSION_CACHE_MAX_BYTES', 32 * 1024 ** 2))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Compressed response bodies, by encoding and ETag (see COMPRESSION_CACHE_MAX_BYTES)
+    'compressed': {
+        'BACKEND': 'api.cache_backends.BudgetLocMemCache',
+        'LOCATION': 'compressed',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_BYTES': COMPRESSION_CACHE_MAX_BYTES, 'MAX_ENTRIES': 100000},
+    },
+    'analysis': {
+        'BACKEND': {
+            'locmem': 'api.cache_backends.BudgetLocMemCache',
+            'file': 'api.cache_backends.BudgetFileBasedCache',
+        }[ANALYSIS_CACHE],
+        'LOCATION': ANALYSIS_CACHE_DIR if ANALYSIS_CACHE == 'file' else 'analysis',
+        'TIMEOUT': ANALYSIS_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_BYTES': ANALYSIS_CACHE_MAX_BYTES,
+            # The byte budget is the limit that matters; this only bounds the entry count
+            'MAX_ENTRIES': 100000,
+        },
+    },
+    # Hit/miss counters and compute_once locks of the analysis cache, outside
+    # its byte budget so evicting results never resets a counter or drops a lock
+    'analysis_meta': {
+        'BACKEND': {
+            'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+            'file': 'api.cache_backends.SharedFileBasedCache',
+        }[ANALYSIS_CACHE],
+        'LOCATION': os.path.join(ANALYSIS_CACHE_DIR, 'meta') if ANALYSIS_CACHE == 'file' else 'analysis-meta',
+        'TIMEOUT': None,
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -108,6 +199,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', "https://chemical-equipment-parameter-visualizer-1-3f2h.onrender.com").split(',')
 # If you want to allow all origins (not recommended for production but useful for troubleshooting):
 # CORS_ALLOW_ALL_ORIGINS = True
+# Lets the web app revalidate history and analysis responses with their ETags
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match')
+CORS_EXPOSE_HEADERS = ['ETag']
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -116,4 +210,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON when orjson is installed, DRF's encoder otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
@@ -0,0 +1,141 @@
+import os
+import threading
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+API_BASE_URL = os.environ.get('EQUIPZENSE_API_URL', 'http://localhost:8000/api/').rstrip('/') + '/'
+# (connect, read) timeouts in seconds
+REQUEST_TIMEOUT = (5, 60)
+# Uploads wait for the server to parse and analyze the file before it responds
+UPLOAD_TIMEOUT = (5, 600)
+# Worker threads, and kept-alive connections per host
+MAX_WORKERS = 4
+# GET responses kept for If-None-Match revalidation
+ETAG_CACHE_ENTRIES = 64
+# Gzip uploads in flight (CSV shrinks 5-10x); set EQUIPZENSE_UPLOAD_GZIP=0 to send plain
+UPLOAD_GZIP = os.environ.get('EQUIPZENSE_UPLOAD_GZIP', '1') != '0'
+
+class _RequestSignals(QObject):
+    # (task, response or None, error message or None)
+    done = pyqtSignal(object, object, object)
+
+class _RequestTask(QRunnable):
+    def __init__(self, client, channel, sequence, method, path, kwargs, on_success, on_error):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.client = client
+        self.channel = channel
+        self.sequence = sequence
+        self.method = method
+        self.path = path
+        self.kwargs = kwargs
+        self.on_success = on_success
+        self.on_error = on_error
+        self.signals = _RequestSignals()
+
+    def run(self):
+        try:
+            response = self.client.request(self.method, self.path, **self.kwargs)
+            self.signals.done.emit(self, response, None)
+        except Exception as e:
+            self.signals.done.emit(self, None, str(e))
+
+class ApiClient(QObject):
+    """
+    Every desktop API call goes through one pooled, kept-alive Session.
+
+    request() is blocking, for code already off the UI thread. submit() runs
+    the call on a thread pool and delivers the response on the UI thread.
+    Calls share a channel when only the latest one matters: a newer submit()
+    removes a still-queued older call and discards the result of one in flight.
+    """
+
+    def __init__(self, token=None, parent=None):
+        super().__init__(parent)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if token:
+            self.set_token(token)
+
+        # (url, params) -> last response carrying an ETag, least recently used first
+        self.etag_cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(MAX_WORKERS)
+        self.sequences = {}
+        self.pending = {}
+
+    def set_token(self, token):
+        self.session.headers['Authorization'] = f'Token {token}'
+        with self.cache_lock:
+            self.etag_cache.clear()
+
+    def url(self, path):
+        return API_BASE_URL + path.lstrip('/')
+
+    def request(self, method, path, **kwargs):
+        """
+        Blocking request. GETs revalidate earlier responses with their ETag;
+        on 304 the stored response is returned without a body transfer.
+        """
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        url = self.url(path)
+        if method.lower() != 'get':
+            return self.session.request(method, url, **kwargs)
+
+        key = (url, tuple(sorted((kwargs.get('params') or {}).items())))
+        with self.cache_lock:
+            cached = self.etag_cache.get(key)
+        if cached is not None:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), 'If-None-Match': cached.headers['ETag']}
+
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            response = cached
+        elif response.status_code != 200 or 'ETag' not in response.headers:
+            return response
+
+        with self.cache_lock:
+            self.etag_cache[key] = response
+            self.etag_cache.move_to_end(key)
+            while len(self.etag_cache) > ETAG_CACHE_ENTRIES:
+                self.etag_cache.popitem(last=False)
+        return response
+
+    def submit(self, channel, method, path, on_success, on_error=None, **kwargs):
+        """
+        Runs a request in the background. `on_success(response)` or
+        `on_error(message)` is called on the UI thread, unless a later call
+        on the same channel superseded this one.
+        """
+        self.cancel(channel)
+        task = _RequestTask(self, channel, self.sequences[channel], method, path, kwargs,
+                            on_success, on_error)
+        task.signals.done.connect(self._finished)
+        self.pending[channel] = task
+        self.pool.start(task)
+
+    def cancel(self, channel):
+        """
+        Supersedes whatever is queued or in flight on `channel`.
+        """
+        self.sequences[channel] = self.sequences.get(channel, 0) + 1
+        previous = self.pending.pop(channel, None)
+        if previous is not None:
+            self.pool.tryTake(previous)
+
+    def _finished(self, task, response, error):
+        if self.pending.get(task.channel) is task:
+            del self.pending[task.channel]
+        if task.sequence != self.sequences.get(task.channel):
+            return
+        if error is None:
+            task.on_success(response)
+        elif task.on_error:
+            task.on_error(error)
+
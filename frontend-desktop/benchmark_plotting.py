@@ -0,0 +1,88 @@
+"""
+Per-update redraw cost of the dashboard line charts: rebuilding the
+figure on every update, LineCharts updates that change the data range
+(a full redraw), and updates within the same range and tick labels
+(only the lines are blitted over the kept background).
+
+    python benchmark_plotting.py --rows 1000 100000 1000000
+"""
+import argparse
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from charts import SERIES, LineCharts
+from decimation import min_max_decimate
+from records import RecordColumns
+
+# Matches a ~1000 px wide canvas: two points per pixel of each chart
+BUDGET = 2 * 1000 // 3
+
+def synthetic_records(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    names = np.array([f'EQ-{i}' for i in range(rows)], dtype=str)
+    types = rng.choice(np.array(['Pump', 'Valve', 'Compressor']), rows)
+    values = {
+        'Flowrate': rng.uniform(50, 250, rows),
+        'Pressure': rng.uniform(2, 10, rows),
+        'Temperature': rng.uniform(80, 160, rows),
+    }
+    return RecordColumns(names, types, values)
+
+def rebuild(figure, records):
+    # The previous approach: clear the figure and recreate and restyle everything
+    figure.clear()
+    axes = figure.subplots(1, 3, sharex=False)
+    for ax, (title, color) in zip(axes, SERIES):
+        x, y = min_max_decimate(records.values[title], BUDGET)
+        ax.set_facecolor("#f8fafc")
+        ax.plot(x, y, color=color, marker='o' if len(records) <= BUDGET else None)
+        ax.set_title(title, color="#1e293b")
+        ax.tick_params(axis='x', colors="#1e293b", rotation=45)
+        ax.tick_params(axis='y', colors="#1e293b")
+        ax.grid(True, linestyle='--', alpha=0.3)
+        for spine in ax.spines.values():
+            spine.set_color('#cccccc')
+    figure.canvas.draw()
+
+def in_place(charts, records):
+    charts.update(records, BUDGET)
+    charts.draw()
+
+def per_update(func, target, subsets, repeat):
+    # One untimed update, so the charts start from a drawn background
+    func(target, subsets[-1])
+    started = time.perf_counter()
+    for i in range(repeat):
+        func(target, subsets[i % len(subsets)])
+    return (time.perf_counter() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'rebuild ms':>11} {'redraw ms':>10} {'blit ms':>8} {'speedup':>8}")
+    for rows in args.rows:
+        records = synthetic_records(rows)
+        # Alternate between filter results, as typing in the dashboard does
+        subsets = [records, records.subset(records.types == 'Pump')]
+
+        figure = plt.figure(figsize=(10, 4))
+        rebuild_time = per_update(rebuild, figure, subsets, args.repeat)
+        plt.close(figure)
+
+        figure = plt.figure(figsize=(10, 4))
+        charts = LineCharts(figure)
+        redraw_time = per_update(in_place, charts, subsets, args.repeat)
+        # The same result again (e.g. a keystroke that matches the same rows)
+        blit_time = per_update(in_place, charts, subsets[1:], args.repeat)
+        plt.close(figure)
+
+        print(f"{rows:>10} {rebuild_time * 1000:>11.1f} {redraw_time * 1000:>10.1f} {blit_time * 1000:>8.1f} "
+              f"{rebuild_time / blit_time:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
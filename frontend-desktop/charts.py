@@ -0,0 +1,129 @@
+import numpy as np
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from decimation import min_max_decimate
+
+SERIES = [
+    ("Flowrate", "#4BC0C0"),
+    ("Pressure", "#36A2EB"),
+    ("Temperature", "#FF6384"),
+]
+# Up to this many records every equipment name gets an x tick label
+MAX_X_LABELS = 12
+
+class LineCharts:
+    """
+    The three parameter line charts. Axes and Line2D artists are created
+    once; updates only replace line data and ticks, and theme changes only
+    recolor, so nothing is rebuilt on a filter keystroke.
+
+    The lines are animated: a full draw renders everything else, and the
+    result is kept as the background. Updates whose data range and tick
+    labels are unchanged then restore the background and blit the lines
+    alone. Anything else (new limits or labels, resize, theme) redraws in
+    full and refreshes the background.
+    """
+
+    def __init__(self, figure):
+        self.figure = figure
+        self.names = []
+        self.axes = figure.subplots(1, 3, sharex=False)
+        self.lines = []
+        for ax, (title, color) in zip(self.axes, SERIES):
+            line, = ax.plot([], [], color=color, animated=True)
+            self.lines.append(line)
+            ax.set_title(title)
+            ax.tick_params(axis='x', rotation=45)
+            ax.grid(True, linestyle='--', alpha=0.3)
+            # Reads self.names, so labels follow the records however the ticks are placed
+            ax.xaxis.set_major_formatter(FuncFormatter(self.name_at))
+        self.background = None
+        # Data range of each chart, and x tick labels, the background shows
+        self.limits = [None] * len(self.axes)
+        self.labels = None
+        self.exporting = False
+        figure.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def name_at(self, value, pos):
+        index = int(round(value))
+        return self.names[index] if 0 <= index < len(self.names) else ''
+
+    def update(self, records, budget):
+        """
+        Shows `records` (a RecordColumns), decimating each series to
+        `budget` points. Small sets are plotted exactly, with markers.
+        Axes are rescaled only when a series' range changes; call draw()
+        to show the result.
+        """
+        self.names = records.names
+        count = len(records)
+        for index, (ax, line, (title, _)) in enumerate(zip(self.axes, self.lines, SERIES)):
+            x, y = min_max_decimate(records.values[title], budget)
+            line.set_data(x, y)
+            line.set_marker('o' if count <= budget else 'None')
+            present = y[~np.isnan(y)]
+            limits = (count, present.min(), present.max()) if len(present) else (count,)
+            if limits == self.limits[index]:
+                continue
+            self.limits[index] = limits
+            # Stale until the next full draw
+            self.background = None
+            if count <= MAX_X_LABELS:
+                ax.set_xticks(range(count))
+            else:
+                ax.xaxis.set_major_locator(MaxNLocator(nbins=MAX_X_LABELS, integer=True))
+            ax.relim()
+            ax.autoscale_view()
+
+        # Same ticks, but a different filter can put other names under them
+        labels = [tuple(self.name_at(tick, None) for tick in ax.get_xticks()) for ax in self.axes]
+        if labels != self.labels:
+            self.labels = labels
+            self.background = None
+
+    def draw(self):
+        """
+        Shows the last update: a blit of the lines over the kept background,
+        or a full redraw when the background is stale.
+        """
+        canvas = self.figure.canvas
+        if self.background is None:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self.background)
+        self.draw_lines()
+        canvas.blit(self.figure.bbox)
+
+    def draw_lines(self):
+        for ax, line in zip(self.axes, self.lines):
+            ax.draw_artist(line)
+
+    def on_draw(self, event):
+        if self.exporting:
+            return
+        self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+        # A full draw leaves out the animated lines
+        self.draw_lines()
+
+    def savefig(self, *args, **kwargs):
+        """
+        Figure.savefig with the lines included (it skips animated artists).
+        """
+        self.exporting = True
+        for line in self.lines:
+            line.set_animated(False)
+        try:
+            self.figure.savefig(*args, **kwargs)
+        finally:
+            for line in self.lines:
+                line.set_animated(True)
+            self.exporting = False
+
+    def set_theme(self, bg_color, text_color, border_color):
+        self.figure.patch.set_facecolor(bg_color)
+        for ax in self.axes:
+            ax.set_facecolor(bg_color)
+            ax.title.set_color(text_color)
+            ax.tick_params(axis='x', colors=text_color)
+            ax.tick_params(axis='y', colors=text_color)
+            for spine in ax.spines.values():
+                spine.set_color(border_color)
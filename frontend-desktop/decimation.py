@@ -0,0 +1,32 @@
+import numpy as np
+
+def min_max_decimate(y, max_points):
+    """
+    Reduces a series to at most `max_points` points by keeping the minimum
+    and maximum of each bucket, so spikes survive the downsampling.
+
+    Missing (NaN) values are dropped. Returns (x, y) where x holds the
+    original row positions of the kept points, in increasing order.
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.flatnonzero(~np.isnan(y))
+    y = y[x]
+    if len(y) <= max_points:
+        return x, y
+
+    # Two points (min and max) per bucket
+    buckets = max(max_points // 2, 1)
+    size = -(-len(y) // buckets)
+    buckets = -(-len(y) // size)
+    # Pad the last bucket with NaN so every bucket has the same width;
+    # padding is shorter than a bucket, so no bucket is all-NaN
+    padded = np.full(buckets * size, np.nan)
+    padded[:len(y)] = y
+    grid = padded.reshape(buckets, size)
+
+    starts = np.arange(buckets) * size
+    keep = np.unique(np.concatenate([
+        starts + np.nanargmin(grid, axis=1),
+        starts + np.nanargmax(grid, axis=1),
+    ]))
+    return x[keep], y[keep]
@@ -1,6 +1,5 @@
 import sys
 import os
-import requests
 import tempfile
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
@@ -8,13 +7,27 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                              QTableWidget, QTableWidgetItem, QHeaderView, QGraphicsDropShadowEffect,
                              QDialog, QLineEdit, QFormLayout, QDialogButtonBox, QMessageBox,
                              QSplitter, QListWidget, QListWidgetItem, QScrollArea)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize, QTimer
 from PyQt5.QtGui import QIcon, QFont, QColor, QPixmap, QPainter
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import matplotlib.pyplot as plt
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas as pdf_canvas
 from reportlab.lib.utils import ImageReader
+from records import RecordColumns, parse_bound
+from charts import LineCharts
+from api_client import UPLOAD_GZIP, UPLOAD_TIMEOUT, ApiClient
+from uploads import CHUNKED_UPLOAD_THRESHOLD, chunked_upload, upload_body
+from transport import DATA_HEADERS, DATA_PARAMS, EVENT_STREAM_TYPE, decode, read_events
+
+# Rows requested per click on "Load More Rows"
+RECORDS_PAGE_LIMIT = 1000
+# Quiet period after the last filter keystroke before the plots are recomputed
+FILTER_DEBOUNCE_MS = 150
+# Points drawn per horizontal pixel of a chart; larger series are decimated
+PLOT_POINTS_PER_PIXEL = 2
+# Uploads are analyzed in the background; the server then streams its progress
+UPLOAD_PARAMS = {'async': 'true'}
 
 # --- Login Dialog ---
 class LoginDialog(QDialog):
@@ -50,8 +63,8 @@ class LoginDialog(QDialog):
             return
             
         try:
-            response = requests.post('http://localhost:8000/api/login/', 
-                                   json={'username': username, 'password': password})
+            response = ApiClient().request('post', 'login/',
+                                           json={'username': username, 'password': password})
             
             if response.status_code == 200:
                 self.token = response.json().get('token')
@@ -107,45 +120,108 @@ class DragDropWidget(QLabel):
 # --- Worker Thread ---
 class UploadWorker(QThread):
     progress = pyqtSignal(int)
+    stage = pyqtSignal(str)
+    # Rows parsed so far and their averages, while the server analyzes the file
+    partial = pyqtSignal(dict)
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
 
-    def __init__(self, file_path, api_url, token):
+    def __init__(self, file_path, api):
         super().__init__()
         self.file_path = file_path
-        self.api_url = api_url
-        self.token = token
+        self.api = api
+        self.percent = -1
+
+    def report(self, done, total):
+        # Called for every block read; only emit when the percentage moves
+        percent = int(done * 100 / total) if total else 100
+        if percent != self.percent:
+            self.percent = percent
+            self.progress.emit(percent)
+
+    def next_stage(self, text):
+        self.percent = -1
+        self.stage.emit(text)
+
+    def upload_at_once(self, name):
+        if UPLOAD_GZIP:
+            self.next_stage(f"Compressing {name}...")
+        body, headers = upload_body(self.file_path, compress=UPLOAD_GZIP,
+                                    on_compress=self.report, on_send=self.report)
+        self.next_stage(f"Uploading {name}...")
+        response = self.api.request('post', 'upload/', params=UPLOAD_PARAMS, data=body, headers=headers,
+                                    timeout=UPLOAD_TIMEOUT)
+        return body, response
+
+    def upload_in_chunks(self, name):
+        # Large files are sent in resumable chunks, after a checksum pass
+        self.next_stage(f"Checking {name}...")
+
+        def on_hash(done, total):
+            self.report(done, total)
+            if done >= total:
+                self.next_stage(f"Uploading {name}...")
+
+        return chunked_upload(self.api, self.file_path, compress=UPLOAD_GZIP, timeout=UPLOAD_TIMEOUT,
+                              on_hash=on_hash, on_send=self.report, params=UPLOAD_PARAMS)
+
+    def wait_for_analysis(self, name, job):
+        # One open connection the server pushes progress into; no polling
+        self.next_stage(f"Analyzing {name}...")
+        url = f"jobs/{job['job_id']}/events/"
+        while True:
+            response = self.api.request('get', url, stream=True, headers={'Accept': EVENT_STREAM_TYPE})
+            if response.status_code != 200:
+                return None, f"Server Error: {response.status_code} - {response.text}"
+            with response:
+                for event, data in read_events(response):
+                    if event == 'progress':
+                        self.report(data['progress'], 100)
+                        if data.get('partial'):
+                            self.partial.emit(data['partial'])
+                    elif event == 'done':
+                        return data, None
+                    elif event == 'failed':
+                        return None, data['error']
+            # The stream timed out or dropped before the analysis ended: reconnect
 
     def run(self):
+        name = os.path.basename(self.file_path)
+        body = None
         try:
-            # Simulate progress for better UX
-            for i in range(0, 90, 10):
-                self.progress.emit(i)
-                self.msleep(50) 
-            
-            headers = {'Authorization': f'Token {self.token}'}
-            with open(self.file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(self.api_url, files=files, headers=headers)
-            
-            self.progress.emit(100)
+            if os.path.getsize(self.file_path) >= CHUNKED_UPLOAD_THRESHOLD:
+                response = self.upload_in_chunks(name)
+            else:
+                body, response = self.upload_at_once(name)
             
-            if response.status_code == 201:
+            if response.status_code == 202:
+                data, error = self.wait_for_analysis(name, response.json())
+                if error:
+                    self.error.emit(error)
+                else:
+                    self.finished.emit(data)
+            elif response.status_code == 201:
                 self.finished.emit(response.json())
             else:
                 self.error.emit(f"Server Error: {response.status_code} - {response.text}")
         except Exception as e:
             self.error.emit(str(e))
+        finally:
+            if body is not None:
+                body.close()
 
 # --- Main Window ---
 class MainWindow(QMainWindow):
     def __init__(self, token):
         super().__init__()
         self.token = token
+        self.api = ApiClient(token, self)
         self.setWindowTitle("EquipZense")
         self.resize(1200, 850)
         self.current_theme = 'light'
         self.current_data = None
+        self.records = RecordColumns.empty()
+        self.filtered_records = self.records
         icon_path = os.path.join(os.path.dirname(__file__), "assets", "equipzense.png")
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
@@ -367,13 +443,23 @@ class MainWindow(QMainWindow):
         # Chart
         self.figure = plt.figure(figsize=(10, 4))
         self.canvas = FigureCanvas(self.figure)
+        self.charts = LineCharts(self.figure)
         self.canvas.setMinimumHeight(350)
         self.dashboard_layout.addWidget(self.canvas)
 
         # Table Preview
+        table_header = QHBoxLayout()
         self.table_label = QLabel("Data Preview")
         self.table_label.setObjectName("SectionTitle")
-        self.dashboard_layout.addWidget(self.table_label)
+        table_header.addWidget(self.table_label)
+        table_header.addStretch()
+
+        # Only the first page of rows comes with the analysis; the rest is fetched on demand
+        self.load_more_btn = QPushButton("Load More Rows")
+        self.load_more_btn.clicked.connect(self.load_more_records)
+        self.load_more_btn.setVisible(False)
+        table_header.addWidget(self.load_more_btn)
+        self.dashboard_layout.addLayout(table_header)
         
         self.table = QTableWidget()
         self.table.setColumnCount(5)
@@ -391,15 +477,16 @@ class MainWindow(QMainWindow):
         self.apply_styles()
         self.load_history_list()
         
-        # Filter signals
-        self.search_input.textChanged.connect(self.update_plots_with_filters)
-        self.filter_type_input.textChanged.connect(self.update_plots_with_filters)
-        self.flow_min.textChanged.connect(self.update_plots_with_filters)
-        self.flow_max.textChanged.connect(self.update_plots_with_filters)
-        self.press_min.textChanged.connect(self.update_plots_with_filters)
-        self.press_max.textChanged.connect(self.update_plots_with_filters)
-        self.temp_min.textChanged.connect(self.update_plots_with_filters)
-        self.temp_max.textChanged.connect(self.update_plots_with_filters)
+        # Filter signals: every keystroke restarts the timer, so a burst of
+        # typing triggers one recompute once the input goes quiet
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DEBOUNCE_MS)
+        self.filter_timer.timeout.connect(self.apply_filters)
+        for field in (self.search_input, self.filter_type_input,
+                      self.flow_min, self.flow_max, self.press_min,
+                      self.press_max, self.temp_min, self.temp_max):
+            field.textChanged.connect(self.filter_timer.start)
 
     def create_stat_card(self, title, value):
         card = QFrame()
@@ -562,18 +649,10 @@ class MainWindow(QMainWindow):
         """
         self.setStyleSheet(style)
         
-        if hasattr(self, 'figure'):
-            self.figure.patch.set_facecolor(bg_color)
-            for ax in self.figure.axes:
-                ax.set_facecolor(bg_color)
-                ax.title.set_color(text_color)
-                ax.xaxis.label.set_color(text_color)
-                ax.yaxis.label.set_color(text_color)
-                ax.tick_params(axis='x', colors=text_color)
-                ax.tick_params(axis='y', colors=text_color)
-                for spine in ax.spines.values():
-                    spine.set_color(border_color)
-            self.canvas.draw()
+        if hasattr(self, 'charts'):
+            # Only colors change; the chart artists are kept
+            self.charts.set_theme(bg_color, text_color, border_color)
+            self.canvas.draw_idle()
 
     def start_upload(self, file_path):
         self.error_label.setVisible(False)
@@ -582,12 +661,22 @@ class MainWindow(QMainWindow):
         self.drag_drop_widget.setText(f"Uploading {os.path.basename(file_path)}...")
         self.drag_drop_widget.setEnabled(False)
 
-        self.worker = UploadWorker(file_path, "http://localhost:8000/api/upload/", self.token)
+        self.worker = UploadWorker(file_path, self.api)
         self.worker.progress.connect(self.progress_bar.setValue)
+        self.worker.stage.connect(self.drag_drop_widget.setText)
+        self.worker.partial.connect(self.show_partial)
         self.worker.finished.connect(self.handle_success)
         self.worker.error.connect(self.handle_error)
         self.worker.start()
 
+    def show_partial(self, partial):
+        # Early numbers from the rows the server has parsed so far
+        averages = partial.get('averages', {})
+        figures = ', '.join(f"{key.capitalize()} {value}" for key, value in averages.items() if value is not None)
+        self.drag_drop_widget.setText(
+            f"Analyzing {os.path.basename(self.worker.file_path)}...\n"
+            f"{partial['rows']:,} rows read" + (f"\nAverages so far: {figures}" if figures else ""))
+
     def handle_success(self, data):
         self.progress_bar.setVisible(False)
         self.upload_container.setVisible(False)
@@ -603,32 +692,32 @@ class MainWindow(QMainWindow):
         self.error_label.setVisible(True)
 
     def load_history_list(self):
-        try:
-            headers = {'Authorization': f'Token {self.token}'}
-            response = requests.get('http://localhost:8000/api/history/', headers=headers)
-            if response.status_code == 200:
-                self.history_list.clear()
-                for item in response.json():
-                    # Display filename and date
-                    date_str = item.get('uploaded_at', '').split('T')[0]
-                    name = os.path.basename(item.get('file', 'Unknown'))
-                    list_item = QListWidgetItem(f"{name}\n{date_str}")
-                    list_item.setData(Qt.UserRole, item.get('id'))
-                    self.history_list.addItem(list_item)
-        except Exception as e:
-            print(f"Error loading history: {e}")
+        self.api.submit('history', 'get', 'history/', self.show_history_list,
+                        lambda error: print(f"Error loading history: {error}"))
+
+    def show_history_list(self, response):
+        if response.status_code == 200:
+            self.history_list.clear()
+            for item in response.json():
+                # Display filename and date
+                date_str = item.get('uploaded_at', '').split('T')[0]
+                name = item.get('filename') or 'Unknown'
+                list_item = QListWidgetItem(f"{name}\n{date_str}")
+                list_item.setData(Qt.UserRole, item.get('id'))
+                self.history_list.addItem(list_item)
 
     def load_history_item(self, item):
         history_id = item.data(Qt.UserRole)
-        try:
-            headers = {'Authorization': f'Token {self.token}'}
-            response = requests.get(f'http://localhost:8000/api/history/{history_id}/', headers=headers)
-            if response.status_code == 200:
-                self.upload_container.setVisible(False)
-                self.dashboard_scroll.setVisible(True)
-                self.update_dashboard(response.json())
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load history item: {e}")
+        # Same channel for every item: clicking another one drops this request
+        self.api.submit('dataset', 'get', f'history/{history_id}/', self.show_history_item,
+                        lambda error: QMessageBox.critical(self, "Error", f"Failed to load history item: {error}"),
+                        headers=DATA_HEADERS, params=DATA_PARAMS)
+
+    def show_history_item(self, response):
+        if response.status_code == 200:
+            self.upload_container.setVisible(False)
+            self.dashboard_scroll.setVisible(True)
+            self.update_dashboard(decode(response))
 
     def update_dashboard(self, data):
         self.current_data = data
@@ -654,11 +743,15 @@ class MainWindow(QMainWindow):
         self.avg_temp.findChild(QLabel, "StatValue").setText(str(avgs.get('temperature', 0)))
 
         # Records and filters
-        self.records = data.get('records', data.get('preview', []))
-        self.update_plots_with_filters()
-
-        # Update Table
-        table_rows = self.filtered_records[:50] if hasattr(self, 'filtered_records') else data.get('preview', [])
+        # Pages requested for the previous dataset no longer apply
+        self.api.cancel('records')
+        # Converted to column arrays once; filtering then works on masks
+        self.records = RecordColumns.from_table(data.get('records', data.get('preview', [])))
+        self.load_more_btn.setVisible(len(self.records) < data.get('total_count', 0))
+        self.apply_filters()
+
+    def update_records_table(self):
+        table_rows = self.filtered_records.rows(50)
         self.table.setRowCount(len(table_rows))
         for i, row in enumerate(table_rows):
             self.table.setItem(i, 0, QTableWidgetItem(str(row.get('Equipment Name', ''))))
@@ -667,68 +760,48 @@ class MainWindow(QMainWindow):
             self.table.setItem(i, 3, QTableWidgetItem(str(row.get('Pressure', ''))))
             self.table.setItem(i, 4, QTableWidgetItem(str(row.get('Temperature', ''))))
     
+    def load_more_records(self):
+        if not self.current_data:
+            return
+        file_id = self.current_data.get('file_id')
+        params = {**DATA_PARAMS, 'offset': len(self.records), 'limit': RECORDS_PAGE_LIMIT}
+        # Arrow or MessagePack when available: numeric columns decode straight to arrays
+        self.api.submit('records', 'get', f'history/{file_id}/records/', self.append_records,
+                        lambda error: QMessageBox.critical(self, "Error", f"Failed to load more rows: {error}"),
+                        headers=DATA_HEADERS, params=params)
+
+    def append_records(self, response):
+        if response.status_code == 200:
+            page = decode(response)
+            self.records = self.records.extend(page.get('results', []))
+            self.load_more_btn.setVisible(page.get('next') is not None)
+            self.apply_filters()
+
+    def apply_filters(self):
+        self.filter_timer.stop()
+        self.update_plots_with_filters()
+        self.update_records_table()
+
     def update_plots_with_filters(self):
-        records = self.records if hasattr(self, 'records') else []
-        # Build filters
-        term = (self.search_input.text() or "").lower()
-        type_filter = (self.filter_type_input.text() or "All")
-        def parse_num(s):
-            try:
-                return float(s)
-            except:
-                return None
-        fmin = parse_num(self.flow_min.text())
-        fmax = parse_num(self.flow_max.text())
-        pmin = parse_num(self.press_min.text())
-        pmax = parse_num(self.press_max.text())
-        tmin = parse_num(self.temp_min.text())
-        tmax = parse_num(self.temp_max.text())
-        
-        filtered = []
-        for r in records:
-            name = str(r.get("Equipment Name", "")).lower()
-            typ = r.get("Type", "")
-            f = float(r.get("Flowrate", 0))
-            p = float(r.get("Pressure", 0))
-            t = float(r.get("Temperature", 0))
-            name_ok = (not term) or (term in name)
-            type_ok = (not type_filter) or (type_filter == "All") or (typ == type_filter)
-            flow_ok = (fmin is None or f >= fmin) and (fmax is None or f <= fmax)
-            press_ok = (pmin is None or p >= pmin) and (pmax is None or p <= pmax)
-            temp_ok = (tmin is None or t >= tmin) and (tmax is None or t <= tmax)
-            if name_ok and type_ok and flow_ok and press_ok and temp_ok:
-                filtered.append(r)
-        self.filtered_records = filtered
-        self.plot_line_charts(filtered)
-    
+        bounds = {
+            'Flowrate': (parse_bound(self.flow_min.text()), parse_bound(self.flow_max.text())),
+            'Pressure': (parse_bound(self.press_min.text()), parse_bound(self.press_max.text())),
+            'Temperature': (parse_bound(self.temp_min.text()), parse_bound(self.temp_max.text())),
+        }
+        mask = self.records.mask(
+            term=(self.search_input.text() or "").strip(),
+            type_filter=(self.filter_type_input.text() or "All").strip(),
+            bounds=bounds,
+        )
+        self.filtered_records = self.records.subset(mask)
+        self.plot_line_charts(self.filtered_records)
+
     def plot_line_charts(self, records):
-        self.figure.clear()
-        is_dark = self.current_theme == 'dark'
-        text_color = "#f8fafc" if is_dark else "#1e293b"
-        bg_color = "#1e293b" if is_dark else "#f8fafc"
-        self.figure.patch.set_facecolor(bg_color)
-        
-        names = [str(r.get("Equipment Name", "")) for r in records]
-        flow = [float(r.get("Flowrate", 0)) for r in records]
-        press = [float(r.get("Pressure", 0)) for r in records]
-        temp = [float(r.get("Temperature", 0)) for r in records]
-        
-        axes = self.figure.subplots(1, 3, sharex=False)
-        config = [
-            ("Flowrate", flow, "#4BC0C0"),
-            ("Pressure", press, "#36A2EB"),
-            ("Temperature", temp, "#FF6384"),
-        ]
-        for ax, (title, series, color) in zip(axes, config):
-            ax.set_facecolor(bg_color)
-            ax.plot(names, series, color=color, marker='o')
-            ax.set_title(title, color=text_color)
-            ax.tick_params(axis='x', colors=text_color, rotation=45)
-            ax.tick_params(axis='y', colors=text_color)
-            ax.grid(True, linestyle='--', alpha=0.3)
-            for spine in ax.spines.values():
-                spine.set_color('#cccccc')
-        self.canvas.draw()
+        # Point budget follows the on-screen width of each of the three charts,
+        # so redraw cost stays bounded however many records are loaded
+        budget = max(self.canvas.width() // 3, 100) * PLOT_POINTS_PER_PIXEL
+        self.charts.update(records, budget)
+        self.charts.draw()
 
     def reset_ui(self):
         self.dashboard_scroll.setVisible(False)
@@ -777,7 +850,7 @@ class MainWindow(QMainWindow):
                 # Chart
                 # Save chart to temp file
                 with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-                    self.figure.savefig(tmp.name, facecolor="white")
+                    self.charts.savefig(tmp.name, facecolor="white")
                     tmp_name = tmp.name
                 
                 # Draw chart
@@ -0,0 +1,131 @@
+import numpy as np
+
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+
+def to_float_array(values):
+    """
+    Converts a list of cells to float64; missing or non-numeric cells become NaN.
+    """
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+def parse_bound(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+class RecordColumns:
+    """
+    Equipment records held as NumPy column arrays, so filters are evaluated
+    as boolean masks instead of a Python loop over dicts.
+    """
+
+    def __init__(self, names, types, values):
+        self.names = names
+        self.types = types
+        # Lowercased once here, not on every keystroke
+        self.names_lower = np.char.lower(names.astype(str))
+        self.values = values
+
+    @classmethod
+    def from_records(cls, records):
+        names = np.array([str(r.get('Equipment Name') or '') for r in records], dtype=str)
+        types = np.array([str(r.get('Type') or '') for r in records], dtype=str)
+        values = {col: to_float_array([r.get(col) for r in records]) for col in NUMERIC_COLUMNS}
+        return cls(names, types, values)
+
+    @classmethod
+    def from_columns(cls, table):
+        """
+        From the columnar shape {"columns": [...], "data": {column: values}},
+        where numeric values may already be float64 arrays.
+        """
+        data = table.get('data', {})
+        n = len(next(iter(data.values()), []))
+
+        def text(col):
+            return np.array(['' if v is None else str(v) for v in data.get(col, [None] * n)], dtype=str)
+
+        values = {col: to_float_array(data[col]) if col in data else np.full(n, np.nan)
+                  for col in NUMERIC_COLUMNS}
+        return cls(text('Equipment Name'), text('Type'), values)
+
+    @classmethod
+    def from_table(cls, table):
+        """
+        From either response shape: a list of row dicts or a columnar dict.
+        """
+        if isinstance(table, dict):
+            return cls.from_columns(table)
+        return cls.from_records(table)
+
+    @classmethod
+    def empty(cls):
+        return cls.from_records([])
+
+    def __len__(self):
+        return len(self.names)
+
+    def extend(self, records):
+        """
+        Returns a new RecordColumns with `records` (either shape) appended.
+        """
+        other = RecordColumns.from_table(records)
+        merged = RecordColumns.__new__(RecordColumns)
+        merged.names = np.concatenate([self.names, other.names])
+        merged.types = np.concatenate([self.types, other.types])
+        merged.names_lower = np.concatenate([self.names_lower, other.names_lower])
+        merged.values = {col: np.concatenate([self.values[col], other.values[col]]) for col in NUMERIC_COLUMNS}
+        return merged
+
+    def mask(self, term='', type_filter='', bounds=None):
+        """
+        Boolean mask of the rows matching a name substring, a Type ('All' or
+        empty for any) and {column: (min, max)} bounds, where None is open.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if type_filter and type_filter != 'All':
+            mask &= self.types == type_filter
+        for col, (low, high) in (bounds or {}).items():
+            if low is not None:
+                mask &= self.values[col] >= low
+            if high is not None:
+                mask &= self.values[col] <= high
+        if term:
+            mask &= np.char.find(self.names_lower, term.lower()) >= 0
+        return mask
+
+    def subset(self, selector):
+        """
+        RecordColumns of the rows picked by a boolean mask or index array.
+        """
+        picked = RecordColumns.__new__(RecordColumns)
+        picked.names = self.names[selector]
+        picked.types = self.types[selector]
+        picked.names_lower = self.names_lower[selector]
+        picked.values = {col: self.values[col][selector] for col in NUMERIC_COLUMNS}
+        return picked
+
+    def rows(self, limit=None):
+        """
+        The first `limit` rows as dicts, for the table.
+        """
+        n = len(self) if limit is None else min(limit, len(self))
+        return [
+            {
+                'Equipment Name': str(self.names[i]),
+                'Type': str(self.types[i]),
+                **{col: None if np.isnan(self.values[col][i]) else float(self.values[col][i])
+                   for col in NUMERIC_COLUMNS},
+            }
+            for i in range(n)
+        ]
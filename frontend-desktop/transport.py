@@ -0,0 +1,112 @@
+import json
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+MSGPACK_TYPE = 'application/msgpack'
+EVENT_STREAM_TYPE = 'text/event-stream'
+# MessagePack extension type the server uses for raw float64 arrays
+FLOAT64_EXT = 1
+
+def accept_header():
+    """
+    Accept header listing the formats this client can decode, best first.
+    Binary formats are only offered when their library is installed.
+    """
+    types = []
+    if pa is not None:
+        types.append(ARROW_TYPE)
+    if msgpack is not None:
+        types.append(f'{MSGPACK_TYPE};q=0.9')
+    # DRF ranks by specificity, not q-values: an explicit application/json
+    # would tie with the binary types and win as the first renderer
+    types.append('*/*;q=0.1' if types else 'application/json')
+    return ', '.join(types)
+
+# Sent with every request for analyses and record pages
+DATA_HEADERS = {'Accept': accept_header()}
+# JSON responses then come columnar too; binary ones always are
+DATA_PARAMS = {'shape': 'columnar'}
+
+def _ext_hook(code, data):
+    if code == FLOAT64_EXT:
+        return np.frombuffer(data, dtype='<f8')
+    return msgpack.ExtType(code, data)
+
+def _arrow_columns(table):
+    data = {}
+    for name in table.column_names:
+        column = table.column(name)
+        if pa.types.is_floating(column.type):
+            # Nulls become NaN; without nulls this is a zero-copy view
+            data[name] = column.to_numpy()
+        else:
+            data[name] = column.to_pylist()
+    return {'columns': table.column_names, 'data': data}
+
+def decode(response):
+    """
+    Body of a JSON, MessagePack or Arrow response as a dict. Numeric columns
+    of binary responses arrive as float64 NumPy arrays.
+    """
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+    if content_type == MSGPACK_TYPE and msgpack is not None:
+        return msgpack.unpackb(response.content, ext_hook=_ext_hook)
+    if content_type == ARROW_TYPE and pa is not None:
+        reader = pa.ipc.open_stream(response.content)
+        table = reader.read_all()
+        metadata = reader.schema.metadata or {}
+        data = json.loads(metadata.get(b'meta', b'{}'))
+        key = metadata.get(b'table', b'').decode()
+        if key:
+            data[key] = _arrow_columns(table)
+        return data
+    return response.json()
+
+def _arrived_blocks(response):
+    # Bytes as they arrive. iter_content() waits for a full block, or for the
+    # end of a stream without chunked encoding, which would hold back events.
+    if hasattr(response.raw, 'read1'):
+        # urllib3 2: returns what has been received, up to the size given
+        while True:
+            block = response.raw.read1(64 * 1024)
+            if not block:
+                return
+            yield block
+    else:
+        yield from response.iter_content(chunk_size=1)
+
+def read_events(response):
+    """
+    Server-Sent Events of a streamed response (stream=True), as (event, data)
+    pairs with the data decoded from JSON, yielded as they arrive. Comment
+    lines (the server's keep-alives) are skipped.
+    """
+    event, data = 'message', []
+    pending = b''
+    for block in _arrived_blocks(response):
+        *lines, pending = (pending + block).split(b'\n')
+        for line in lines:
+            line = line.rstrip(b'\r').decode('utf-8')
+            if not line:
+                if data:
+                    yield event, json.loads('\n'.join(data))
+                event, data = 'message', []
+                continue
+            if line.startswith(':'):
+                continue
+            field, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            if field == 'event':
+                event = value
+            elif field == 'data':
+                data.append(value)
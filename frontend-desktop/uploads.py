@@ -0,0 +1,182 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import requests
+
+READ_BLOCK = 256 * 1024
+GZIP_LEVEL = 6
+# Files from this size on go through the resumable uploads/ API
+CHUNKED_UPLOAD_THRESHOLD = 64 * 1024 * 1024
+# Consecutive failures of one chunk before the upload is given up
+CHUNK_RETRIES = 5
+
+class StreamingBody:
+    """
+    File-like request body concatenating byte strings and open files.
+
+    requests sends it with a Content-Length and reads it block by block, so
+    the upload is never held in memory. `progress(done, total)` is called
+    with the number of bytes handed to the connection so far.
+    """
+
+    def __init__(self, segments, progress=None):
+        self.segments = list(segments)
+        self.total = sum(
+            len(s) if isinstance(s, bytes) else os.fstat(s.fileno()).st_size - s.tell()
+            for s in self.segments
+        )
+        self.progress = progress
+        self.done = 0
+        self.index = 0
+        self.position = 0
+
+    def __len__(self):
+        return self.total
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.total - self.done
+        chunks = []
+        wanted = size
+        while wanted > 0 and self.index < len(self.segments):
+            segment = self.segments[self.index]
+            if isinstance(segment, bytes):
+                chunk = segment[self.position:self.position + wanted]
+                self.position += len(chunk)
+                exhausted = self.position >= len(segment)
+            else:
+                chunk = segment.read(wanted)
+                exhausted = not chunk
+            if chunk:
+                chunks.append(chunk)
+                wanted -= len(chunk)
+            if exhausted:
+                self.index += 1
+                self.position = 0
+        data = b''.join(chunks)
+        self.done += len(data)
+        if self.progress and data:
+            self.progress(self.done, self.total)
+        return data
+
+    def close(self):
+        for segment in self.segments:
+            if not isinstance(segment, bytes):
+                segment.close()
+
+def multipart_body(path, field='file', progress=None):
+    """
+    multipart/form-data body with the file at `path` as its only field.
+    Returns (StreamingBody, content type).
+    """
+    boundary = uuid.uuid4().hex
+    filename = os.path.basename(path).replace('"', '')
+    head = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        'Content-Type: text/csv\r\n\r\n'
+    ).encode('utf-8')
+    tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    body = StreamingBody([head, open(path, 'rb'), tail], progress)
+    return body, f'multipart/form-data; boundary={boundary}'
+
+def upload_body(path, compress=False, on_compress=None, on_send=None):
+    """
+    Request body and headers for uploading the CSV at `path`.
+
+    With `compress`, the multipart body is gzipped into a temporary file
+    first (reporting through `on_compress`), so the compressed body still
+    has a known length and is sent with `Content-Encoding: gzip`.
+    """
+    body, content_type = multipart_body(path)
+    headers = {'Content-Type': content_type}
+    if not compress:
+        body.progress = on_send
+        return body, headers
+
+    body.progress = on_compress
+    spool = tempfile.TemporaryFile()
+    try:
+        with gzip.GzipFile(fileobj=spool, mode='wb', compresslevel=GZIP_LEVEL) as gz:
+            shutil.copyfileobj(body, gz, READ_BLOCK)
+    except Exception:
+        spool.close()
+        raise
+    finally:
+        body.close()
+    spool.seek(0)
+    headers['Content-Encoding'] = 'gzip'
+    return StreamingBody([spool], on_send), headers
+
+def file_sha256(path, progress=None):
+    size = os.path.getsize(path)
+    digest = hashlib.sha256()
+    done = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b''):
+            digest.update(block)
+            done += len(block)
+            if progress:
+                progress(done, size)
+    return digest.hexdigest()
+
+def chunked_upload(api, path, compress=False, timeout=None, on_hash=None, on_send=None, params=None):
+    """
+    Uploads the file at `path` through the resumable uploads/ API and
+    returns the finalize response (or the first response that failed).
+    `params` are sent with the finalize request (e.g. async).
+
+    A chunk that fails on the network is retried with backoff, resuming
+    from the offset the server reports, so a dropped connection costs at
+    most one chunk. With `compress` every chunk is sent gzipped.
+    """
+    size = os.path.getsize(path)
+    sha256 = file_sha256(path, on_hash)
+    response = api.request('post', 'uploads/', json={
+        'filename': os.path.basename(path), 'size': size, 'sha256': sha256,
+    })
+    if response.status_code != 201:
+        return response
+    session = response.json()
+    url = f"uploads/{session['id']}/"
+    chunk_size = session['chunk_size']
+    headers = {'Content-Type': 'application/octet-stream'}
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+
+    offset = session['received']
+    failures = 0
+    with open(path, 'rb') as f:
+        while offset < size:
+            f.seek(offset)
+            data = f.read(chunk_size)
+            if compress:
+                data = gzip.compress(data, GZIP_LEVEL)
+            try:
+                response = api.request('put', url, params={'offset': offset}, data=data,
+                                       headers=headers, timeout=timeout)
+            except requests.RequestException:
+                failures += 1
+                if failures > CHUNK_RETRIES:
+                    raise
+                time.sleep(min(2 ** failures, 30))
+                try:
+                    # Part of the chunk may have been stored before the connection dropped
+                    offset = api.request('get', url).json()['received']
+                except requests.RequestException:
+                    pass
+                continue
+
+            if response.status_code not in (200, 409):
+                return response
+            # 409: the server holds a different number of bytes; continue from there
+            offset = response.json()['received']
+            failures = 0
+            if on_send:
+                on_send(offset, size)
+
+    return api.request('post', f'{url}finalize/', params=params, timeout=timeout)
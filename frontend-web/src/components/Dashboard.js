@@ -2,6 +2,7 @@ import React, { useState, useRef, useEffect, useMemo } from "react";
 import axios from "axios";
 import { Line } from "react-chartjs-2";
 import { useAuth } from "../context/AuthContext";
+import followJob from "../utils/jobEvents";
 import { useLocation } from "react-router-dom";
 import { jsPDF } from "jspdf";
 import html2canvas from "html2canvas";
@@ -16,6 +17,11 @@ import {
   Legend,
 } from "chart.js";
 
+// Rows requested per query page and per click on "Load More Rows"
+const RECORDS_PAGE_LIMIT = 1000;
+// Delay after the last filter keystroke before querying the server
+const FILTER_DEBOUNCE_MS = 300;
+
 // Register ChartJS components
 ChartJS.register(
   CategoryScale,
@@ -30,6 +36,10 @@ ChartJS.register(
 const Dashboard = () => {
   const [stats, setStats] = useState(null);
   const [uploadProgress, setUploadProgress] = useState(0);
+  // "Uploading" while the file is sent, "Analyzing" while the server parses it
+  const [uploadStage, setUploadStage] = useState("Uploading");
+  // Rows parsed so far and their averages, pushed by the server during analysis
+  const [partial, setPartial] = useState(null);
   const [isUploading, setIsUploading] = useState(false);
   const [isDragging, setIsDragging] = useState(false);
   const [error, setError] = useState(null);
@@ -44,6 +54,10 @@ const Dashboard = () => {
   const [pressMax, setPressMax] = useState("");
   const [tempMin, setTempMin] = useState("");
   const [tempMax, setTempMax] = useState("");
+  // Rows matching the current filters, paged from the server query endpoint
+  const [records, setRecords] = useState([]);
+  const [matchCount, setMatchCount] = useState(0);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     if (location.state?.historyData) {
@@ -51,12 +65,90 @@ const Dashboard = () => {
     }
   }, [location]);
 
+  const filterParams = useMemo(
+    () => ({
+      name: searchTerm,
+      type: selectedType,
+      flowrate_min: flowMin,
+      flowrate_max: flowMax,
+      pressure_min: pressMin,
+      pressure_max: pressMax,
+      temperature_min: tempMin,
+      temperature_max: tempMax,
+    }),
+    [
+      searchTerm,
+      selectedType,
+      flowMin,
+      flowMax,
+      pressMin,
+      pressMax,
+      tempMin,
+      tempMax,
+    ],
+  );
+
+  // Filtering runs on the server; a burst of keystrokes sends a single query
+  useEffect(() => {
+    if (!stats) {
+      setRecords([]);
+      setMatchCount(0);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const res = await axios.get(
+          `${process.env.REACT_APP_API_URL}/api/history/${stats.file_id}/query/`,
+          {
+            headers: { Authorization: `Token ${token}` },
+            params: { ...filterParams, offset: 0, limit: RECORDS_PAGE_LIMIT },
+          },
+        );
+        if (!cancelled) {
+          setRecords(res.data.results);
+          setMatchCount(res.data.count);
+        }
+      } catch (err) {
+        console.error("Failed to filter records", err);
+      }
+    }, FILTER_DEBOUNCE_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [stats, filterParams, token]);
+
+  const loadMoreRecords = async () => {
+    setLoadingMore(true);
+    try {
+      const res = await axios.get(
+        `${process.env.REACT_APP_API_URL}/api/history/${stats.file_id}/query/`,
+        {
+          headers: { Authorization: `Token ${token}` },
+          params: {
+            ...filterParams,
+            offset: records.length,
+            limit: RECORDS_PAGE_LIMIT,
+          },
+        },
+      );
+      setRecords((prev) => [...prev, ...res.data.results]);
+    } catch (err) {
+      console.error("Failed to load more rows", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const processFile = async (file) => {
     if (!file) return;
 
     // Reset states
     setIsUploading(true);
     setUploadProgress(0);
+    setUploadStage("Uploading");
+    setPartial(null);
     setError(null);
     setStats(null);
 
@@ -69,8 +161,9 @@ const Dashboard = () => {
         setIsUploading(false);
         return;
       }
+      // Analyzed in the background; its progress is then pushed over the job's event stream
       const res = await axios.post(
-        `${process.env.REACT_APP_API_URL}/api/upload/`,
+        `${process.env.REACT_APP_API_URL}/api/upload/?async=true`,
         formData,
         {
           headers: {
@@ -86,63 +179,41 @@ const Dashboard = () => {
         },
       );
 
+      setUploadStage("Analyzing");
+      setUploadProgress(0);
+      const result = await followJob(res.data.events_url, token, (job) => {
+        setUploadProgress(job.progress);
+        if (job.partial) setPartial(job.partial);
+      });
+      setUploadProgress(100);
+
       // Artificial delay to show 100% completion briefly
       setTimeout(() => {
-        setStats(res.data);
+        setStats(result);
+        setPartial(null);
         setIsUploading(false);
       }, 500);
     } catch (err) {
       console.error(err);
-      setError("Failed to process file. Please ensure it's a valid CSV.");
+      setError(
+        err.response?.data?.error ||
+          err.message ||
+          "Failed to process file. Please ensure it's a valid CSV.",
+      );
+      setPartial(null);
       setIsUploading(false);
     }
   };
 
   const types = useMemo(() => {
-    if (!stats?.records) return [];
-    const set = new Set(stats.records.map((r) => r["Type"]));
-    return ["All", ...Array.from(set)];
+    if (!stats?.type_distribution) return [];
+    return ["All", ...Object.keys(stats.type_distribution)];
   }, [stats]);
 
-  const filteredRecords = useMemo(() => {
-    if (!stats?.records) return [];
-    return stats.records.filter((r) => {
-      const nameOk =
-        !searchTerm ||
-        String(r["Equipment Name"])
-          .toLowerCase()
-          .includes(searchTerm.toLowerCase());
-      const typeOk = selectedType === "All" || r["Type"] === selectedType;
-      const f = parseFloat(r["Flowrate"]);
-      const p = parseFloat(r["Pressure"]);
-      const t = parseFloat(r["Temperature"]);
-      const flowOk =
-        (flowMin === "" || f >= parseFloat(flowMin)) &&
-        (flowMax === "" || f <= parseFloat(flowMax));
-      const pressOk =
-        (pressMin === "" || p >= parseFloat(pressMin)) &&
-        (pressMax === "" || p <= parseFloat(pressMax));
-      const tempOk =
-        (tempMin === "" || t >= parseFloat(tempMin)) &&
-        (tempMax === "" || t <= parseFloat(tempMax));
-      return nameOk && typeOk && flowOk && pressOk && tempOk;
-    });
-  }, [
-    stats,
-    selectedType,
-    searchTerm,
-    flowMin,
-    flowMax,
-    pressMin,
-    pressMax,
-    tempMin,
-    tempMax,
-  ]);
-
-  const names = filteredRecords.map((r) => r["Equipment Name"]);
-  const flowSeries = filteredRecords.map((r) => r["Flowrate"]);
-  const pressSeries = filteredRecords.map((r) => r["Pressure"]);
-  const tempSeries = filteredRecords.map((r) => r["Temperature"]);
+  const names = records.map((r) => r["Equipment Name"]);
+  const flowSeries = records.map((r) => r["Flowrate"]);
+  const pressSeries = records.map((r) => r["Pressure"]);
+  const tempSeries = records.map((r) => r["Temperature"]);
 
   const handleDownloadPDF = async () => {
     const element = document.querySelector(".dashboard");
@@ -324,7 +395,18 @@ const Dashboard = () => {
                       style={{ width: `${uploadProgress}%` }}
                     ></div>
                   </div>
-                  <span className="progress-text">{uploadProgress}%</span>
+                  <span className="progress-text">
+                    {uploadStage} {uploadProgress}%
+                  </span>
+                  {partial && (
+                    <small className="progress-text">
+                      {partial.rows.toLocaleString()} rows read
+                      {Object.entries(partial.averages)
+                        .filter(([, value]) => value !== null)
+                        .map(([key, value]) => ` · ${key} ${value}`)
+                        .join("")}
+                    </small>
+                  )}
                 </div>
               )}
 
@@ -554,14 +636,14 @@ const Dashboard = () => {
                 <table>
                   <thead>
                     <tr>
-                      {stats.records &&
-                        Object.keys(stats.records[0]).map((key) => (
+                      {records.length > 0 &&
+                        Object.keys(records[0]).map((key) => (
                           <th key={key}>{key}</th>
                         ))}
                     </tr>
                   </thead>
                   <tbody>
-                    {filteredRecords.slice(0, 50).map((row, idx) => (
+                    {records.slice(0, 50).map((row, idx) => (
                       <tr key={idx}>
                         {Object.values(row).map((val, i) => (
                           <td key={i}>{val}</td>
@@ -571,6 +653,18 @@ const Dashboard = () => {
                   </tbody>
                 </table>
               </div>
+              {records.length < matchCount && (
+                <button
+                  className="reset-btn"
+                  onClick={loadMoreRecords}
+                  disabled={loadingMore}
+                  style={{ marginTop: 12 }}
+                >
+                  {loadingMore
+                    ? "Loading..."
+                    : `Load More Rows (${records.length} of ${matchCount})`}
+                </button>
+              )}
             </div>
           </div>
         )}
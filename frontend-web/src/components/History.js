@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from "react";
-import axios from "axios";
 import { useNavigate } from "react-router-dom";
 import { useAuth } from "../context/AuthContext";
+import cachedGet from "../utils/cachedGet";
 
 const History = () => {
   const [history, setHistory] = useState([]);
@@ -11,12 +11,8 @@ const History = () => {
   useEffect(() => {
     const fetchHistory = async () => {
       try {
-        const res = await axios.get(`${process.env.REACT_APP_API_URL}/api/history/`, {
-          headers: {
-            Authorization: `Token ${token}`,
-          },
-        });
-        setHistory(res.data);
+        const data = await cachedGet(`${process.env.REACT_APP_API_URL}/api/history/`, token);
+        setHistory(data);
       } catch (err) {
         console.error(err);
       }
@@ -29,13 +25,11 @@ const History = () => {
 
   const handleView = async (id) => {
     try {
-      const res = await axios.get(
+      const data = await cachedGet(
         `${process.env.REACT_APP_API_URL}/api/history/${id}/`,
-        {
-          headers: { Authorization: `Token ${token}` },
-        },
+        token,
       );
-      navigate("/", { state: { historyData: res.data } });
+      navigate("/", { state: { historyData: data } });
     } catch (err) {
       console.error("Failed to load history item", err);
     }
@@ -68,7 +62,7 @@ const History = () => {
                   className="history-row"
                 >
                   <td>{item.id}</td>
-                  <td>{item.file.split("/").pop()}</td>
+                  <td>{item.filename}</td>
                   <td>{new Date(item.uploaded_at).toLocaleString()}</td>
                 </tr>
               ))}
@@ -0,0 +1,40 @@
+import axios from "axios";
+
+// Responses kept for revalidation, keyed by token and URL; oldest dropped first
+const MAX_ENTRIES = 50;
+const cache = new Map();
+
+// GET that revalidates with If-None-Match: when the server answers 304 the
+// stored body is reused, so revisiting a history item costs one empty round trip.
+const cachedGet = async (url, token) => {
+  const key = `${token} ${url}`;
+  const cached = cache.get(key);
+  const headers = { Authorization: `Token ${token}` };
+  if (cached) {
+    headers["If-None-Match"] = cached.etag;
+  }
+
+  const res = await axios.get(url, {
+    headers,
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  });
+
+  if (res.status === 304 && cached) {
+    // Re-insert to mark as most recently used
+    cache.delete(key);
+    cache.set(key, cached);
+    return cached.data;
+  }
+
+  const etag = res.headers.etag;
+  if (etag) {
+    cache.delete(key);
+    cache.set(key, { etag, data: res.data });
+    if (cache.size > MAX_ENTRIES) {
+      cache.delete(cache.keys().next().value);
+    }
+  }
+  return res.data;
+};
+
+export default cachedGet;
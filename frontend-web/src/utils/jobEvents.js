@@ -0,0 +1,59 @@
+// Splits a Server-Sent Events message into its event name and JSON data
+const parseMessage = (message) => {
+  let event = "message";
+  const data = [];
+  for (const line of message.split("\n")) {
+    // Lines starting with ":" are the server's keep-alive comments
+    if (!line || line.startsWith(":")) continue;
+    const colon = line.indexOf(":");
+    const field = colon === -1 ? line : line.slice(0, colon);
+    let value = colon === -1 ? "" : line.slice(colon + 1);
+    if (value.startsWith(" ")) value = value.slice(1);
+    if (field === "event") event = value;
+    else if (field === "data") data.push(value);
+  }
+  return data.length ? { event, data: JSON.parse(data.join("\n")) } : null;
+};
+
+// Follows a background analysis job through its event stream (jobs/<id>/events/)
+// and resolves with the analysis once it is done. EventSource cannot send the
+// Authorization header, so the stream is read with fetch. `onProgress` receives
+// each job status (progress and partial aggregates) as the server pushes it.
+const followJob = async (url, token, onProgress) => {
+  for (;;) {
+    const res = await fetch(url, {
+      headers: { Authorization: `Token ${token}`, Accept: "text/event-stream" },
+    });
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true }).replace(/\r/g, "");
+      let end;
+      while ((end = buffer.indexOf("\n\n")) !== -1) {
+        const message = parseMessage(buffer.slice(0, end));
+        buffer = buffer.slice(end + 2);
+        if (!message) continue;
+        if (message.event === "progress") {
+          onProgress?.(message.data);
+        } else if (message.event === "done") {
+          reader.cancel();
+          return message.data;
+        } else if (message.event === "failed") {
+          reader.cancel();
+          throw new Error(message.data.error);
+        }
+      }
+    }
+    // Errors (e.g. 404) come as a single "failed" event, handled above
+    if (!res.ok) {
+      throw new Error(`Server error: ${res.status}`);
+    }
+    // The stream timed out or dropped before the analysis ended: reconnect
+  }
+};
+
+export default followJob;